@@ -0,0 +1,74 @@
+"""Add player_stats aggregate table
+
+Revision ID: 3f9a61c2d8e4
+Revises: 7c74978dadc3
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a61c2d8e4'
+down_revision: Union[str, None] = '7c74978dadc3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+STAT_COLUMNS = (
+    'matches_played',
+    'matches_won',
+    'matches_lost',
+    'total_score',
+    'highest_score',
+    'current_streak',
+    'win_streak',
+)
+
+
+def upgrade() -> None:
+    player_stats = op.create_table(
+        'player_stats',
+        sa.Column('league_id', sa.String(), sa.ForeignKey('leagues.id'), nullable=False),
+        sa.Column('player_name', sa.String(), nullable=False),
+        *[sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in STAT_COLUMNS],
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('league_id', 'player_name'),
+    )
+
+    # Backfill by replaying existing matches in creation order
+    bind = op.get_bind()
+    stats = {}
+    matches = bind.execute(sa.text(
+        'SELECT league_id, player1, player2, player1_score, player2_score, winner '
+        'FROM matches ORDER BY created_at ASC, id ASC'
+    ))
+    for league_id, player1, player2, score1, score2, winner in matches:
+        for name, score in ((player1, score1), (player2, score2)):
+            stat = stats.setdefault((league_id, name), dict.fromkeys(STAT_COLUMNS, 0))
+            stat['matches_played'] += 1
+            stat['total_score'] += score
+            stat['highest_score'] = max(stat['highest_score'], score)
+            if winner == name:
+                stat['matches_won'] += 1
+                stat['current_streak'] = stat['current_streak'] + 1 if stat['current_streak'] > 0 else 1
+                stat['win_streak'] = max(stat['win_streak'], stat['current_streak'])
+            else:
+                stat['matches_lost'] += 1
+                stat['current_streak'] = stat['current_streak'] - 1 if stat['current_streak'] < 0 else -1
+
+    for league_id, name in bind.execute(sa.text('SELECT league_id, name FROM players')):
+        stats.setdefault((league_id, name), dict.fromkeys(STAT_COLUMNS, 0))
+
+    if stats:
+        op.bulk_insert(player_stats, [
+            {'league_id': league_id, 'player_name': name, **stat}
+            for (league_id, name), stat in stats.items()
+        ])
+
+
+def downgrade() -> None:
+    op.drop_table('player_stats')
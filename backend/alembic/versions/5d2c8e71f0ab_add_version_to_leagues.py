@@ -0,0 +1,26 @@
+"""Add version counter to leagues table
+
+Revision ID: 5d2c8e71f0ab
+Revises: b81e4d07a9c3
+Create Date: 2026-10-18 11:37:02.584113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c8e71f0ab'
+down_revision: Union[str, None] = 'b81e4d07a9c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('leagues', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('leagues', 'version')
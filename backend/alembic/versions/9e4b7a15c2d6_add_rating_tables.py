@@ -0,0 +1,99 @@
+"""Add Elo rating tables
+
+Revision ID: 9e4b7a15c2d6
+Revises: 5d2c8e71f0ab
+Create Date: 2026-10-18 13:04:51.730216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7a15c2d6'
+down_revision: Union[str, None] = '5d2c8e71f0ab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Defaults of RATING_INITIAL and RATING_K_FACTOR at the time of this migration
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+
+def upgrade() -> None:
+    player_ratings = op.create_table(
+        'player_ratings',
+        sa.Column('league_id', sa.String(), sa.ForeignKey('leagues.id'), nullable=False),
+        sa.Column('player_name', sa.String(), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=False),
+        sa.Column('matches_rated', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('league_id', 'player_name'),
+    )
+    rating_states = op.create_table(
+        'rating_states',
+        sa.Column('league_id', sa.String(), sa.ForeignKey('leagues.id'), nullable=False),
+        sa.Column('matches_applied', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_match_id', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('league_id'),
+    )
+    op.create_table(
+        'rating_checkpoints',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('league_id', sa.String(), sa.ForeignKey('leagues.id'), nullable=False),
+        sa.Column('match_created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('match_id', sa.String(), nullable=False),
+        sa.Column('matches_applied', sa.Integer(), nullable=False),
+        sa.Column('ratings', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_rating_checkpoints_league_position',
+        'rating_checkpoints',
+        ['league_id', 'match_created_at', 'match_id'],
+    )
+
+    # Backfill by replaying existing matches in creation order. No checkpoints
+    # are written here, so the first edit in a league replays it in full.
+    bind = op.get_bind()
+    ratings = {}
+    states = {}
+    matches = bind.execute(sa.text(
+        'SELECT league_id, id, player1, player2, winner, created_at '
+        'FROM matches ORDER BY created_at ASC, id ASC'
+    ))
+    for league_id, match_id, player1, player2, winner, created_at in matches:
+        state = states.setdefault(league_id, {'matches_applied': 0})
+        state.update(matches_applied=state['matches_applied'] + 1, last_created_at=created_at, last_match_id=match_id)
+        if player1 == player2:
+            continue
+        rating1 = ratings.setdefault((league_id, player1), [INITIAL_RATING, 0])
+        rating2 = ratings.setdefault((league_id, player2), [INITIAL_RATING, 0])
+        expected1 = 1 / (1 + 10 ** ((rating2[0] - rating1[0]) / 400))
+        delta = K_FACTOR * ((1.0 if winner == player1 else 0.0) - expected1)
+        rating1[0] += delta
+        rating2[0] -= delta
+        rating1[1] += 1
+        rating2[1] += 1
+
+    if ratings:
+        op.bulk_insert(player_ratings, [
+            {'league_id': league_id, 'player_name': name, 'rating': rating, 'matches_rated': count}
+            for (league_id, name), (rating, count) in ratings.items()
+        ])
+    if states:
+        op.bulk_insert(rating_states, [
+            {'league_id': league_id, **state}
+            for league_id, state in states.items()
+        ])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rating_checkpoints_league_position', table_name='rating_checkpoints')
+    op.drop_table('rating_checkpoints')
+    op.drop_table('rating_states')
+    op.drop_table('player_ratings')
@@ -0,0 +1,34 @@
+"""Add idempotency_key to matches
+
+Revision ID: a7e3c5f90b12
+Revises: f4b8d2e61a93
+Create Date: 2026-10-18 17:40:12.530861
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3c5f90b12'
+down_revision: Union[str, None] = 'f4b8d2e61a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing matches have no key; NULLs never collide in the unique index
+    op.add_column('matches', sa.Column('idempotency_key', sa.String(), nullable=True))
+    op.create_index(
+        'ix_matches_league_id_idempotency_key',
+        'matches',
+        ['league_id', 'idempotency_key'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_matches_league_id_idempotency_key', table_name='matches')
+    op.drop_column('matches', 'idempotency_key')
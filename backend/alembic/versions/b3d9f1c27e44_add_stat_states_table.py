@@ -0,0 +1,40 @@
+"""Add stat_states table
+
+Revision ID: b3d9f1c27e44
+Revises: a7e3c5f90b12
+Create Date: 2026-10-18 19:12:36.402518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9f1c27e44'
+down_revision: Union[str, None] = 'a7e3c5f90b12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stat_states',
+        sa.Column('league_id', sa.String(), sa.ForeignKey('leagues.id'), nullable=False),
+        sa.Column('last_created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_match_id', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('league_id'),
+    )
+    # Existing aggregates cover every match recorded so far
+    op.execute("""
+        INSERT INTO stat_states (league_id, last_created_at, last_match_id)
+        SELECT m.league_id, m.created_at, MAX(m.id)
+        FROM matches m
+        WHERE m.created_at = (SELECT MAX(created_at) FROM matches WHERE league_id = m.league_id)
+        GROUP BY m.league_id, m.created_at
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('stat_states')
@@ -0,0 +1,31 @@
+"""Add composite index on matches(league_id, created_at DESC, id)
+
+Revision ID: b81e4d07a9c3
+Revises: 3f9a61c2d8e4
+Create Date: 2026-10-18 10:04:51.392716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e4d07a9c3'
+down_revision: Union[str, None] = '3f9a61c2d8e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_matches_league_id_created_at_id',
+        'matches',
+        ['league_id', sa.text('created_at DESC'), 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_matches_league_id_created_at_id', table_name='matches')
@@ -0,0 +1,43 @@
+"""Add stat_snapshots table
+
+Revision ID: c6f18d3a9b27
+Revises: 9e4b7a15c2d6
+Create Date: 2026-10-18 14:21:09.406377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f18d3a9b27'
+down_revision: Union[str, None] = '9e4b7a15c2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Snapshots are written by the first point-in-time reads, so no backfill
+    op.create_table(
+        'stat_snapshots',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('league_id', sa.String(), sa.ForeignKey('leagues.id'), nullable=False),
+        sa.Column('match_created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('match_id', sa.String(), nullable=False),
+        sa.Column('matches_applied', sa.Integer(), nullable=False),
+        sa.Column('stats', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_stat_snapshots_league_position',
+        'stat_snapshots',
+        ['league_id', 'match_created_at', 'match_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stat_snapshots_league_position', table_name='stat_snapshots')
+    op.drop_table('stat_snapshots')
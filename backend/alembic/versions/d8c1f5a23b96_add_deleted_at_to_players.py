@@ -0,0 +1,26 @@
+"""Add deleted_at to players
+
+Revision ID: d8c1f5a23b96
+Revises: b3d9f1c27e44
+Create Date: 2026-10-18 21:05:48.117302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8c1f5a23b96'
+down_revision: Union[str, None] = 'b3d9f1c27e44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('players', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('players', 'deleted_at')
@@ -0,0 +1,94 @@
+"""Reference players from matches by an integer key
+
+Revision ID: e2a7c94d1f60
+Revises: c6f18d3a9b27
+Create Date: 2026-10-18 15:02:37.815540
+
+"""
+from typing import Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c94d1f60'
+down_revision: Union[str, None] = 'c6f18d3a9b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Integer surrogate becomes the primary key; the uuid stays as a unique public id
+    op.add_column('players', sa.Column('pk', sa.Integer(), sa.Identity(), nullable=False))
+    op.drop_constraint('players_pkey', 'players', type_='primary')
+    op.create_primary_key('players_pkey', 'players', ['pk'])
+    op.drop_index('ix_players_id', table_name='players')
+    op.create_index('ix_players_id', 'players', ['id'], unique=True)
+
+    # One player per name and league: keep the oldest row of any duplicates
+    op.execute(
+        'DELETE FROM players p USING players q '
+        'WHERE p.league_id = q.league_id AND p.name = q.name AND p.pk > q.pk'
+    )
+
+    # Register every name that so far only appeared in matches
+    bind = op.get_bind()
+    missing = bind.execute(sa.text(
+        'SELECT league_id, name, MIN(created_at) FROM ('
+        '  SELECT league_id, player1 AS name, created_at FROM matches'
+        '  UNION ALL SELECT league_id, player2, created_at FROM matches'
+        ') names '
+        'WHERE NOT EXISTS ('
+        '  SELECT 1 FROM players p WHERE p.league_id = names.league_id AND p.name = names.name'
+        ') '
+        'GROUP BY league_id, name'
+    )).all()
+    if missing:
+        players = sa.table(
+            'players',
+            sa.column('id', sa.String()),
+            sa.column('name', sa.String()),
+            sa.column('league_id', sa.String()),
+            sa.column('created_at', sa.DateTime(timezone=True)),
+        )
+        op.bulk_insert(players, [
+            {'id': str(uuid.uuid4()), 'name': name, 'league_id': league_id, 'created_at': created_at}
+            for league_id, name, created_at in missing
+        ])
+    op.create_unique_constraint('uq_players_league_id_name', 'players', ['league_id', 'name'])
+
+    op.add_column('matches', sa.Column('player1_id', sa.Integer(), nullable=True))
+    op.add_column('matches', sa.Column('player2_id', sa.Integer(), nullable=True))
+    op.add_column('matches', sa.Column('winner_side', sa.SmallInteger(), nullable=True))
+    op.execute(
+        'UPDATE matches SET '
+        'player1_id = (SELECT pk FROM players p WHERE p.league_id = matches.league_id AND p.name = matches.player1), '
+        'player2_id = (SELECT pk FROM players p WHERE p.league_id = matches.league_id AND p.name = matches.player2), '
+        'winner_side = CASE WHEN player1_score > player2_score THEN 1 ELSE 2 END'
+    )
+    op.alter_column('matches', 'player1_id', nullable=False)
+    op.alter_column('matches', 'player2_id', nullable=False)
+    op.alter_column('matches', 'winner_side', nullable=False)
+    op.create_foreign_key('matches_player1_id_fkey', 'matches', 'players', ['player1_id'], ['pk'])
+    op.create_foreign_key('matches_player2_id_fkey', 'matches', 'players', ['player2_id'], ['pk'])
+    op.create_index('ix_matches_league_id_player1_id', 'matches', ['league_id', 'player1_id'])
+    op.create_index('ix_matches_league_id_player2_id', 'matches', ['league_id', 'player2_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_matches_league_id_player2_id', table_name='matches')
+    op.drop_index('ix_matches_league_id_player1_id', table_name='matches')
+    op.drop_constraint('matches_player2_id_fkey', 'matches', type_='foreignkey')
+    op.drop_constraint('matches_player1_id_fkey', 'matches', type_='foreignkey')
+    op.drop_column('matches', 'winner_side')
+    op.drop_column('matches', 'player2_id')
+    op.drop_column('matches', 'player1_id')
+
+    op.drop_constraint('uq_players_league_id_name', 'players', type_='unique')
+    op.drop_index('ix_players_id', table_name='players')
+    op.create_index('ix_players_id', 'players', ['id'], unique=False)
+    op.drop_constraint('players_pkey', 'players', type_='primary')
+    op.create_primary_key('players_pkey', 'players', ['id'])
+    op.drop_column('players', 'pk')
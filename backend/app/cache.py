@@ -0,0 +1,126 @@
+"""In-process cache for league-scoped read results.
+
+Entries are keyed by league, endpoint, call arguments and whether they were
+read from a replica, evicted LRU once the cache is full and expired after a
+TTL. Writes in ``crud`` drop every entry of the league they touch; the TTL
+only bounds staleness across worker processes.
+Requests that already read the league's version (for their ETag) note it with
+``note_league_version``, and their entries are kept per version, so a write in
+another worker is never served under the ETag of the version after it.
+"""
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Set, Tuple
+
+from .database import settings
+
+CacheKey = Tuple[str, str, Hashable]
+
+class LeagueCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._league_keys: Dict[str, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: CacheKey, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            self._league_keys.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_league(self, league_id: str) -> None:
+        with self._lock:
+            for key in self._league_keys.pop(league_id, set()):
+                self._entries.pop(key, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._league_keys.clear()
+
+    def _remove(self, key: CacheKey) -> None:
+        self._entries.pop(key, None)
+        keys = self._league_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._league_keys[key[0]]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.CACHE_ENABLED,
+                "entries": len(self._entries),
+                "leagues": len(self._league_keys),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+cache = LeagueCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+
+def note_league_version(db: Any, league_id: str, version: int) -> None:
+    """Record the league version the session's reads answer for"""
+    db.info.setdefault("league_versions", {})[league_id] = version
+
+def cached(endpoint: str) -> Callable:
+    """Cache a ``crud`` read taking ``(db, league_id, ...)``.
+
+    Cached values are shared between callers and must not be mutated.
+    """
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not settings.CACHE_ENABLED:
+                return fn(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            db = params.pop("db")
+            league_id = params.pop("league_id")
+            # A lagging replica's results must not answer reads pinned to the primary
+            replica = bool(db.info.get("replica"))
+            version = db.info.get("league_versions", {}).get(league_id)
+            key = (league_id, endpoint, (replica, version, tuple(sorted(params.items()))))
+
+            hit, value = cache.get(key)
+            if hit:
+                return value
+            value = fn(*args, **kwargs)
+            cache.set(key, value)
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,111 @@
+"""Group commit for match submissions.
+
+With MATCH_COALESCE_ENABLED, ``POST /matches`` hands its match to the
+coalescer instead of committing on its own. Submissions to a league arriving
+within MATCH_COALESCE_WINDOW_MS of the first are recorded together by
+``crud.create_matches``: one transaction, one multi-row INSERT ... RETURNING
+and one commit, so a burst waits on a handful of commits rather than one per
+match. Each caller still gets its own match back. When a batch fails, its
+submissions are retried one transaction each, so a caller only ever sees the
+error of its own submission.
+"""
+import asyncio
+import contextvars
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from . import crud, models, schemas
+from .database import AsyncSessionLocal, SessionLocal, run, settings
+
+Submission = Tuple[schemas.MatchCreate, Optional[str], "asyncio.Future[models.Match]"]
+
+def _resolve(future: asyncio.Future, result: Any = None, exception: Optional[BaseException] = None) -> None:
+    # The caller may have gone away, cancelling its future
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+class MatchCoalescer:
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: Dict[str, List[Submission]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.matches = 0
+        self.fallbacks = 0
+
+    async def submit(
+        self,
+        league_id: str,
+        match: schemas.MatchCreate,
+        idempotency_key: Optional[str] = None
+    ) -> models.Match:
+        """Record a match as part of the league's next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(league_id)
+        if batch is None:
+            batch = self._pending[league_id] = []
+            # In a fresh context, so the batch is not counted towards the first request's profile
+            loop.call_later(self.window, self._flush, league_id, batch, context=contextvars.Context())
+        batch.append((match, idempotency_key, future))
+        if len(batch) >= self.max_batch:
+            loop.call_soon(self._flush, league_id, batch, context=contextvars.Context())
+        return await future
+
+    def _flush(self, league_id: str, batch: List[Submission]) -> None:
+        # A batch flushed for being full is flushed again when its timer fires
+        if self._pending.get(league_id) is not batch:
+            return
+        del self._pending[league_id]
+        # The loop only keeps weak references to tasks
+        task = asyncio.ensure_future(self._record(league_id, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _record(self, league_id: str, batch: List[Submission]) -> None:
+        self.batches += 1
+        self.matches += len(batch)
+        try:
+            results = await self._call(crud.create_matches, league_id, [(match, key) for match, key, _ in batch])
+        except Exception:
+            self.fallbacks += 1
+            for match, key, future in batch:
+                try:
+                    result = await self._call(crud.create_match, league_id, match, key)
+                except Exception as exc:
+                    _resolve(future, exception=exc)
+                else:
+                    _resolve(future, result)
+            return
+        for (_, _, future), result in zip(batch, results):
+            _resolve(future, result)
+
+    async def _call(self, fn: Callable, *args: Any) -> Any:
+        """Call a ``crud`` function with a session of its own, off the event loop"""
+        if settings.ASYNC_DB:
+            async with AsyncSessionLocal() as db:
+                return await run(db, fn, *args)
+
+        def call() -> Any:
+            with SessionLocal() as db:
+                return fn(db, *args)
+        return await run_in_threadpool(call)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.MATCH_COALESCE_ENABLED,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "pending_leagues": len(self._pending),
+            "batches": self.batches,
+            "matches": self.matches,
+            "fallbacks": self.fallbacks,
+        }
+
+coalescer = MatchCoalescer(settings.MATCH_COALESCE_WINDOW_MS, settings.MATCH_COALESCE_MAX_BATCH)
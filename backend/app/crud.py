@@ -1,12 +1,87 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, delete, desc, event, insert, select, update, Row, Select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.util import await_only
 import uuid
-from typing import List, Optional, Dict
-from . import models, schemas
+import json
+import base64
+import csv
+import heapq
+import io
+import logging
+import numpy as np
+from array import array
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, List, Optional, Dict, Set, Tuple
+from . import models, schemas, sql_stats, numpy_stats, match_io, ratings, series, jobs
+from .cache import cache, cached
+from .events import publisher
+from .match_log import match_logs
+from .database import SessionLocal, settings
+
+logger = logging.getLogger("versus.crud")
+
+def _touch_league(db: Session, league_id: str) -> Optional[int]:
+    """Record a write to a league inside the current transaction.
+
+    Bumps the league's version (used for ETags) and, once the transaction
+    commits, drops the league's cached reads. Returns the new version.
+    """
+    version = db.execute(
+        update(models.League)
+        .where(models.League.id == league_id)
+        # Keep updated_at for edits of the league itself
+        .values(version=models.League.version + 1, updated_at=models.League.updated_at)
+        .returning(models.League.version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.info.setdefault("touched_leagues", set()).add(league_id)
+    return version
+
+def _append_to_match_log(db: Session, league_id: str, version: Optional[int], matches: Iterable[Any]) -> None:
+    """Extend this worker's match log of the league with new matches once the transaction commits"""
+    if settings.MATCH_LOG_ENABLED and version is not None:
+        rows = [
+            (match.player1_id, match.player2_id, match.player1_score, match.player2_score,
+             match.winner_side, match.created_at, match.id)
+            for match in matches
+        ]
+        db.info.setdefault("match_log_appends", []).append((league_id, version, rows))
+
+def _emit(db: Session, league_id: str, event_type: str, data: Any) -> None:
+    """Queue an event for the league's subscribers, sent once the transaction commits"""
+    db.info.setdefault("league_events", []).append((league_id, event_type, data))
+
+def _match_event(match: models.Match) -> Dict:
+    return schemas.MatchResponse.model_validate(match).model_dump(mode="json")
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    appended = set()
+    for league_id, version, rows in session.info.pop("match_log_appends", ()):
+        match_logs.append(league_id, version, rows)
+        appended.add(league_id)
+    for league_id in session.info.pop("touched_leagues", ()):
+        cache.invalidate_league(league_id)
+        if league_id not in appended:
+            match_logs.discard(league_id)
+    for league_id, event_type, data in session.info.pop("league_events", ()):
+        publisher.publish(league_id, event_type, data)
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("touched_leagues", None)
+    session.info.pop("match_log_appends", None)
+    session.info.pop("league_events", None)
 
 # League operations
 def get_leagues(db: Session) -> List[models.League]:
-    return db.query(models.League).order_by(models.League.created_at.desc()).all()
+    return db.query(models.League)\
+        .filter(models.League.deleted_at.is_(None))\
+        .order_by(models.League.created_at.desc())\
+        .all()
 
 def create_league(db: Session, league: schemas.LeagueCreate) -> models.League:
     db_league = models.League(
@@ -20,7 +95,14 @@ def create_league(db: Session, league: schemas.LeagueCreate) -> models.League:
     return db_league
 
 def get_league(db: Session, league_id: str) -> Optional[models.League]:
-    return db.query(models.League).filter(models.League.id == league_id).first()
+    """The league, or None when it does not exist or is being deleted"""
+    return db.query(models.League)\
+        .filter(models.League.id == league_id)\
+        .filter(models.League.deleted_at.is_(None))\
+        .first()
+
+def get_league_version(db: Session, league_id: str) -> Optional[int]:
+    return db.query(models.League.version).filter(models.League.id == league_id).scalar()
 
 def update_league(
     db: Session,
@@ -31,69 +113,306 @@ def update_league(
     if db_league:
         for key, value in league_update.dict(exclude_unset=True).items():
             setattr(db_league, key, value)
+        _touch_league(db, league_id)
+        _emit(db, league_id, "league_updated", {"id": league_id})
         db.commit()
         db.refresh(db_league)
     return db_league
 
-def delete_league(db: Session, league_id: str) -> bool:
-    """Delete a league and all its related data"""
-    # First check if league exists
+def delete_league(db: Session, league_id: str) -> Optional[models.Job]:
+    """Hide a league and queue the job that deletes it and all its related data"""
     db_league = get_league(db, league_id)
     if not db_league:
-        return False
-    
-    try:
-        # Delete all matches in the league
-        db.query(models.Match).filter(models.Match.league_id == league_id).delete()
-        
-        # Delete all players in the league
-        db.query(models.Player).filter(models.Player.league_id == league_id).delete()
-        
-        # Delete the league itself
-        db.query(models.League).filter(models.League.id == league_id).delete()
-        
-        db.commit()
-        return True
-    except Exception:
-        db.rollback()
-        return False
+        return None
+
+    db_league.deleted_at = datetime.now(timezone.utc)
+    job = jobs.enqueue(db, "delete_league", league_id)
+    _touch_league(db, league_id)
+    _emit(db, league_id, "league_deleted", {"id": league_id})
+    db.commit()
+    return job
 
 # Match operations
+class PlayerDeletedError(Exception):
+    """A match names a player whose deletion is under way"""
+    def __init__(self, player_name: str):
+        super().__init__(f"Player {player_name} is being deleted")
+        self.player_name = player_name
+
+def _resolve_players(db: Session, league_id: str, names: Iterable[str]) -> Dict[str, int]:
+    """Map player names to their keys, registering names the league hasn't seen.
+
+    Raises PlayerDeletedError for a player who is being deleted.
+    """
+    names = set(names)
+    players = db.query(models.Player.name, models.Player.pk, models.Player.deleted_at)\
+        .filter(models.Player.league_id == league_id)\
+        .filter(models.Player.name.in_(names))\
+        .all()
+    deleted = sorted(name for name, _, deleted_at in players if deleted_at is not None)
+    if deleted:
+        raise PlayerDeletedError(deleted[0])
+    keys = {name: pk for name, pk, _ in players}
+    for name in names - keys.keys():
+        db_player = models.Player(id=str(uuid.uuid4()), name=name, league_id=league_id)
+        try:
+            with db.begin_nested():
+                db.add(db_player)
+            keys[name] = db_player.pk
+        except IntegrityError:
+            # Registered concurrently by another request
+            keys[name] = _player_key(db, league_id, name)
+    return keys
+
+def _player_key(db: Session, league_id: str, name: str) -> Optional[int]:
+    return db.query(models.Player.pk)\
+        .filter(models.Player.league_id == league_id)\
+        .filter(models.Player.name == name)\
+        .scalar()
+
+def _hidden_players(db: Session, league_id: str) -> Set[str]:
+    """Names of players whose deletion job has not removed them yet"""
+    return {
+        name for (name,) in db.query(models.Player.name)
+            .filter(models.Player.league_id == league_id)
+            .filter(models.Player.deleted_at.isnot(None))
+    }
+
+def _player_filter(key: Optional[int]):
+    """Matches a player took part in, by key"""
+    return (models.Match.player1_id == key) | (models.Match.player2_id == key)
+
+def _winner_side(player1_score: int, player2_score: int) -> int:
+    return 1 if player1_score > player2_score else 2
+
 def create_match(
     db: Session,
     league_id: str,
-    match: schemas.MatchCreate
+    match: schemas.MatchCreate,
+    idempotency_key: Optional[str] = None
 ) -> models.Match:
-    winner = match.player1 if match.player1_score > match.player2_score else match.player2
-    db_match = models.Match(
-        id=str(uuid.uuid4()),
-        league_id=league_id,
-        player1=match.player1,
-        player2=match.player2,
-        player1_score=match.player1_score,
-        player2_score=match.player2_score,
-        winner=winner
-    )
-    db.add(db_match)
+    """Record a match; a key the league has already seen returns the match recorded then"""
+    try:
+        return create_matches(db, league_id, [(match, idempotency_key)])[0]
+    except IntegrityError:
+        db.rollback()
+        # Another transaction recorded the same key first
+        existing = _matches_by_idempotency_key(db, league_id, {idempotency_key}) if idempotency_key else {}
+        if idempotency_key not in existing:
+            raise
+        return existing[idempotency_key]
+
+def _matches_by_idempotency_key(db: Session, league_id: str, keys: Set[str]) -> Dict[str, models.Match]:
+    return {
+        match.idempotency_key: match
+        for match in db.query(models.Match)
+            .filter(models.Match.league_id == league_id)
+            .filter(models.Match.idempotency_key.in_(keys))
+            .all()
+    }
+
+def create_matches(
+    db: Session,
+    league_id: str,
+    submissions: List[Tuple[schemas.MatchCreate, Optional[str]]]
+) -> List[models.Match]:
+    """Record (match, idempotency key) submissions in one transaction, one match per submission.
+
+    New matches go in with a single flush, which the ORM sends as multi-row
+    INSERT ... RETURNING for the server-stamped created_at. A key seen before,
+    or repeated within the call, gets the match recorded for it first.
+    Raises IntegrityError when a concurrent transaction commits one of the keys.
+    """
+    keys = {key for _, key in submissions if key is not None}
+    recorded = _matches_by_idempotency_key(db, league_id, keys) if keys else {}
+    pending = [match for match, key in submissions if key not in recorded]
+    players = _resolve_players(db, league_id, {name for match in pending for name in (match.player1, match.player2)})
+
+    results, created = [], []
+    for match, key in submissions:
+        if key is not None and key in recorded:
+            results.append(recorded[key])
+            continue
+        db_match = models.Match(
+            id=str(uuid.uuid4()),
+            league_id=league_id,
+            player1_id=players[match.player1],
+            player2_id=players[match.player2],
+            player1=match.player1,
+            player2=match.player2,
+            player1_score=match.player1_score,
+            player2_score=match.player2_score,
+            winner=match.player1 if match.player1_score > match.player2_score else match.player2,
+            winner_side=_winner_side(match.player1_score, match.player2_score),
+            idempotency_key=key
+        )
+        if key is not None:
+            recorded[key] = db_match
+        results.append(db_match)
+        created.append(db_match)
+
+    ids = [match.id for match in results]
+    if created:
+        db.add_all(created)
+        # Flush for the server-stamped created_at the aggregates and ratings order by
+        db.flush()
+        ordered = sorted(created, key=lambda match: (match.created_at, match.id))
+        _record_match_stats(db, league_id, ordered)
+        ratings.record_matches(db, league_id, ordered)
+        _invalidate_stat_snapshots(db, league_id, ordered[0].created_at, ordered[0].id)
+        version = _touch_league(db, league_id)
+        _append_to_match_log(db, league_id, version, ordered)
+        for db_match in ordered:
+            _emit(db, league_id, "match_created", _match_event(db_match))
+        db.commit()
+    # Reload the results with one query rather than a refresh per match
+    db.query(models.Match).filter(models.Match.id.in_(ids)).all()
+    return results
+
+_MatchRow = namedtuple("_MatchRow", [
+    "id", "league_id", "player1_id", "player2_id", "player1", "player2",
+    "player1_score", "player2_score", "winner", "winner_side", "created_at"
+])
+
+# Rows per INSERT statement when COPY is not available
+BULK_INSERT_BATCH_SIZE = 1000
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _insert_match_rows(db: Session, rows: List[_MatchRow]) -> None:
+    """Insert rows with COPY on Postgres and batched executemany elsewhere"""
+    connection = db.connection()
+    dialect = connection.dialect
+    if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(row._replace(created_at=row.created_at.isoformat()))
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY matches ({', '.join(_MatchRow._fields)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+    elif dialect.name == "postgresql" and dialect.driver == "asyncpg":
+        # Inside AsyncSession.run_sync, so the driver coroutine can be awaited here
+        await_only(connection.connection.driver_connection.copy_records_to_table(
+            "matches", records=rows, columns=list(_MatchRow._fields)
+        ))
+    else:
+        for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            db.execute(
+                insert(models.Match),
+                [row._asdict() for row in rows[start:start + BULK_INSERT_BATCH_SIZE]]
+            )
+
+def create_matches_bulk(
+    db: Session,
+    league_id: str,
+    matches: List[schemas.MatchImport]
+) -> int:
+    """Insert many matches in one transaction; returns the number inserted.
+
+    Matches without ``created_at`` are stamped now, keeping their input order.
+    """
+    if not matches:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    keys = _resolve_players(db, league_id, {name for match in matches for name in (match.player1, match.player2)})
+    rows = [
+        _MatchRow(
+            id=str(uuid.uuid4()),
+            league_id=league_id,
+            player1_id=keys[match.player1],
+            player2_id=keys[match.player2],
+            player1=match.player1,
+            player2=match.player2,
+            player1_score=match.player1_score,
+            player2_score=match.player2_score,
+            winner=match.player1 if match.player1_score > match.player2_score else match.player2,
+            winner_side=_winner_side(match.player1_score, match.player2_score),
+            created_at=_as_utc(match.created_at) if match.created_at else now + timedelta(microseconds=i)
+        )
+        for i, match in enumerate(matches)
+    ]
+
+    latest = db.query(func.max(models.Match.created_at))\
+        .filter(models.Match.league_id == league_id)\
+        .scalar()
+    appended = latest is None or min(row.created_at for row in rows) > _as_utc(latest)
+
+    _insert_match_rows(db, rows)
+
+    ordered = sorted(rows, key=lambda row: (row.created_at, row.id))
+    # Pure appends are folded into the aggregates in one pass; both fall back
+    # to rebuilding when the rows land before matches already applied
+    _record_match_stats(db, league_id, ordered)
+    ratings.record_matches(db, league_id, ordered)
+    _invalidate_stat_snapshots(db, league_id, ordered[0].created_at, ordered[0].id)
+
+    version = _touch_league(db, league_id)
+    if appended:
+        _append_to_match_log(db, league_id, version, ordered)
+    # One summary event rather than one per row; subscribers refetch
+    _emit(db, league_id, "matches_imported", {"count": len(rows)})
     db.commit()
-    db.refresh(db_match)
-    return db_match
+    return len(rows)
 
 def get_match(db: Session, match_id: str) -> Optional[models.Match]:
     return db.query(models.Match).filter(models.Match.id == match_id).first()
 
+def encode_match_cursor(match: Any) -> str:
+    """Opaque cursor pointing just past ``match`` in newest-first order"""
+    payload = json.dumps([match.created_at.isoformat(), match.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_match_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of ``encode_match_cursor``; raises ValueError on malformed input"""
+    try:
+        created_at, match_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(match_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
 def get_matches(
     db: Session,
     league_id: str,
     limit: int = 50,
-    offset: int = 0
-) -> List[models.Match]:
-    return db.query(models.Match)\
+    offset: int = 0,
+    cursor: Optional[str] = None
+) -> List[Row]:
+    """Newest-first page of a league's matches.
+
+    Pass the ``cursor`` of the previous page's last match to seek straight to the
+    next page via the (league_id, created_at DESC, id) index; ``offset`` is kept
+    for older clients. Rows hold just the ``match_io.RESPONSE_COLUMNS``, skipping
+    ORM hydration.
+    """
+    query = db.query(*(getattr(models.Match, column) for column in match_io.RESPONSE_COLUMNS))\
         .filter(models.Match.league_id == league_id)\
-        .order_by(desc(models.Match.created_at))\
-        .offset(offset)\
-        .limit(limit)\
-        .all()
+        .order_by(desc(models.Match.created_at), models.Match.id)
+    if cursor is not None:
+        created_at, match_id = decode_match_cursor(cursor)
+        query = query.filter(
+            # Redundant with the OR, but gives the index scan its starting point
+            (models.Match.created_at <= created_at) &
+            ((models.Match.created_at < created_at) |
+             ((models.Match.created_at == created_at) & (models.Match.id > match_id)))
+        )
+    elif offset:
+        query = query.offset(offset)
+    return query.limit(limit).all()
+
+def match_export_statement(league_id: str) -> Select:
+    """All of a league's matches, oldest first, in ``match_io.EXPORT_COLUMNS`` order"""
+    return select(*(getattr(models.Match, column) for column in match_io.EXPORT_COLUMNS))\
+        .where(models.Match.league_id == league_id)\
+        .order_by(models.Match.created_at.asc(), models.Match.id.asc())
 
 def update_match(
     db: Session,
@@ -102,10 +421,22 @@ def update_match(
 ) -> Optional[models.Match]:
     db_match = get_match(db, match_id)
     if db_match:
+        affected_players = {db_match.player1, db_match.player2}
         update_data = match_update.dict(exclude_unset=True)
         update_data["winner"] = match_update.player1 if match_update.player1_score > match_update.player2_score else match_update.player2
+        update_data["winner_side"] = _winner_side(match_update.player1_score, match_update.player2_score)
+        keys = _resolve_players(db, db_match.league_id, (match_update.player1, match_update.player2))
+        update_data["player1_id"] = keys[match_update.player1]
+        update_data["player2_id"] = keys[match_update.player2]
         for key, value in update_data.items():
             setattr(db_match, key, value)
+        affected_players.update({db_match.player1, db_match.player2})
+        db.flush()
+        _rebuild_player_stats(db, db_match.league_id, affected_players)
+        ratings.replay_from_match(db, db_match.league_id, db_match.created_at, db_match.id)
+        _invalidate_stat_snapshots(db, db_match.league_id, db_match.created_at, db_match.id)
+        _touch_league(db, db_match.league_id)
+        _emit(db, db_match.league_id, "match_updated", _match_event(db_match))
         db.commit()
         db.refresh(db_match)
     return db_match
@@ -113,161 +444,716 @@ def update_match(
 def delete_match(db: Session, match_id: str) -> bool:
     db_match = get_match(db, match_id)
     if db_match:
+        league_id = db_match.league_id
+        affected_players = {db_match.player1, db_match.player2}
+        created_at, match_id = db_match.created_at, db_match.id
         db.delete(db_match)
+        db.flush()
+        _rebuild_player_stats(db, league_id, affected_players)
+        ratings.replay_from_match(db, league_id, created_at, match_id)
+        _invalidate_stat_snapshots(db, league_id, created_at, match_id)
+        _touch_league(db, league_id)
+        _emit(db, league_id, "match_deleted", {"id": match_id, "league_id": league_id})
         db.commit()
         return True
     return False
 
 # Ranking and statistics operations
-def get_rankings(db: Session, league_id: str) -> List[schemas.PlayerStats]:
-    # First, get all players from matches
-    matches = db.query(models.Match)\
-        .filter(models.Match.league_id == league_id)\
-        .order_by(models.Match.created_at.asc())\
-        .all()
-    
-    player_stats: Dict[str, schemas.PlayerStats] = {}
-    player_streaks: Dict[str, List[bool]] = {}  # Store win/loss sequence for each player
-    
-    # Initialize stats for all players from matches
+def _apply_result(stat: models.PlayerStat, score: int, won: bool) -> None:
+    """Fold one match result into a player's running aggregate"""
+    stat.matches_played += 1
+    stat.total_score += score
+    stat.highest_score = max(stat.highest_score, score)
+    if won:
+        stat.matches_won += 1
+        stat.current_streak = stat.current_streak + 1 if stat.current_streak > 0 else 1
+        stat.win_streak = max(stat.win_streak, stat.current_streak)
+    else:
+        stat.matches_lost += 1
+        stat.current_streak = stat.current_streak - 1 if stat.current_streak < 0 else -1
+
+_STAT_COLUMNS = (
+    "matches_played",
+    "matches_won",
+    "matches_lost",
+    "total_score",
+    "highest_score",
+    "current_streak",
+    "win_streak",
+)
+
+def _new_player_stat(league_id: str, player_name: str) -> models.PlayerStat:
+    stat = models.PlayerStat(league_id=league_id, player_name=player_name)
+    for column in _STAT_COLUMNS:
+        setattr(stat, column, 0)
+    return stat
+
+class _StatAccumulator:
+    """Running aggregate of one player for reads and rebuilds.
+
+    Holds the same fields as ``models.PlayerStat`` without the ORM's attribute
+    instrumentation, which dominates loops over many matches.
+    """
+    __slots__ = ("player_name",) + _STAT_COLUMNS
+
+    def __init__(self, player_name: str, values: Iterable[int] = (0,) * len(_STAT_COLUMNS)):
+        self.player_name = player_name
+        for column, value in zip(_STAT_COLUMNS, values):
+            setattr(self, column, value)
+
+def _match_position(created_at: datetime, match_id: str) -> Tuple[datetime, str]:
+    return _as_utc(created_at), match_id
+
+def _stat_state(db: Session, league_id: str) -> models.StatState:
+    """Lock the league's aggregate position, serializing writers of its player_stats"""
+    query = db.query(models.StatState)\
+        .filter(models.StatState.league_id == league_id)\
+        .with_for_update()
+    state = query.first()
+    if state is None:
+        try:
+            with db.begin_nested():
+                db.add(models.StatState(league_id=league_id))
+        except IntegrityError:
+            # Created concurrently by another request
+            pass
+        state = query.first()
+    return state
+
+def _advance_stat_state(state: models.StatState, created_at: datetime, match_id: str) -> None:
+    """Move the position forward to a match applied to the aggregates"""
+    if state.last_created_at is None or \
+            _match_position(created_at, match_id) > _match_position(state.last_created_at, state.last_match_id):
+        state.last_created_at, state.last_match_id = created_at, match_id
+
+def _add_player_stats(db: Session, league_id: str, names: Iterable[str]) -> None:
+    """Insert zeroed aggregates for players that have none yet"""
+    # Flush first, so only the new rows go in the savepoints
+    db.flush()
+    for name in names:
+        try:
+            with db.begin_nested():
+                db.add(_new_player_stat(league_id, name))
+        except IntegrityError:
+            # Created concurrently by another request
+            pass
+
+def _record_match_stats(db: Session, league_id: str, matches: Iterable[Any]) -> None:
+    """Apply newly inserted matches, oldest first, to the aggregates of their players.
+
+    Concurrent writers can commit out of order, and a match can land before the
+    last one applied. Its players are then rebuilt from the matches table, as
+    the streaks depend on the order of their matches.
+    """
+    matches = list(matches)
+    if not matches:
+        return
+    names = {name for match in matches for name in (match.player1, match.player2)}
+    state = _stat_state(db, league_id)
+    first, last = matches[0], matches[-1]
+    if state.last_created_at is not None and \
+            _match_position(first.created_at, first.id) <= _match_position(state.last_created_at, state.last_match_id):
+        db.flush()
+        _rebuild_player_stats(db, league_id, names)
+        _advance_stat_state(state, last.created_at, last.id)
+        return
+
+    query = db.query(models.PlayerStat)\
+        .filter(models.PlayerStat.league_id == league_id)\
+        .filter(models.PlayerStat.player_name.in_(names))\
+        .with_for_update()
+    stats = {stat.player_name: stat for stat in query.all()}
+    if names - stats.keys():
+        _add_player_stats(db, league_id, names - stats.keys())
+        stats = {stat.player_name: stat for stat in query.all()}
+
     for match in matches:
-        # Process player1
-        if match.player1 not in player_stats:
-            player_stats[match.player1] = schemas.PlayerStats(player_name=match.player1)
-            player_streaks[match.player1] = []
-        stats1 = player_stats[match.player1]
-        stats1.matches_played += 1
-        stats1.total_score += match.player1_score
-        stats1.highest_score = max(stats1.highest_score, match.player1_score)
-        
-        # Record win/loss for streaks
-        won = match.winner == match.player1
-        player_streaks[match.player1].append(won)
-        if won:
-            stats1.matches_won += 1
-        else:
-            stats1.matches_lost += 1
-        
-        # Process player2
-        if match.player2 not in player_stats:
-            player_stats[match.player2] = schemas.PlayerStats(player_name=match.player2)
-            player_streaks[match.player2] = []
-        stats2 = player_stats[match.player2]
-        stats2.matches_played += 1
-        stats2.total_score += match.player2_score
-        stats2.highest_score = max(stats2.highest_score, match.player2_score)
-        
-        # Record win/loss for streaks
-        won = match.winner == match.player2
-        player_streaks[match.player2].append(won)
-        if won:
-            stats2.matches_won += 1
-        else:
-            stats2.matches_lost += 1
-    
-    # Get all players from the players table
-    players = db.query(models.Player)\
-        .filter(models.Player.league_id == league_id)\
-        .all()
-    
-    # Add players without matches
-    for player in players:
-        if player.name not in player_stats:
-            player_stats[player.name] = schemas.PlayerStats(
-                player_name=player.name,
-                matches_played=0,
-                matches_won=0,
-                matches_lost=0,
-                total_score=0,
-                highest_score=0,
-                average_score=0,
-                win_rate=0,
-                current_streak=0,
-                win_streak=0
+        _apply_result(stats[match.player1], match.player1_score, match.winner == match.player1)
+        _apply_result(stats[match.player2], match.player2_score, match.winner == match.player2)
+    _advance_stat_state(state, last.created_at, last.id)
+
+def _rebuild_player_stats(
+    db: Session,
+    league_id: str,
+    player_names: Optional[Set[str]] = None
+) -> None:
+    """Recompute aggregates from the matches table.
+
+    With ``player_names`` only those players are rebuilt, otherwise the whole
+    league is. Players registered in the league keep a row even without matches.
+    """
+    state = _stat_state(db, league_id)
+    stat_query = db.query(models.PlayerStat).filter(models.PlayerStat.league_id == league_id)
+    match_query = db.query(models.Match).filter(models.Match.league_id == league_id)
+    player_query = db.query(models.Player.name).filter(models.Player.league_id == league_id)
+    if player_names is not None:
+        if not player_names:
+            return
+        stat_query = stat_query.filter(models.PlayerStat.player_name.in_(player_names))
+        player_query = player_query.filter(models.Player.name.in_(player_names))
+        keys = select(models.Player.pk)\
+            .where(models.Player.league_id == league_id)\
+            .where(models.Player.name.in_(player_names))
+        match_query = match_query.filter(models.Match.player1_id.in_(keys) | models.Match.player2_id.in_(keys))
+
+    stats: Dict[str, _StatAccumulator] = {}
+    last = None
+    for match in match_query.order_by(models.Match.created_at.asc(), models.Match.id.asc()):
+        last = match
+        for name, score in ((match.player1, match.player1_score), (match.player2, match.player2_score)):
+            if player_names is not None and name not in player_names:
+                continue
+            if name not in stats:
+                stats[name] = _StatAccumulator(name)
+            _apply_result(stats[name], score, match.winner == name)
+
+    for (name,) in player_query:
+        if name not in stats:
+            stats[name] = _StatAccumulator(name)
+    if player_names is None:
+        # Every match is applied now
+        state.last_created_at, state.last_match_id = (last.created_at, last.id) if last else (None, None)
+
+    # Overwrite existing rows in place and drop the ones nobody backs anymore
+    for stat in stat_query.with_for_update():
+        fresh = stats.pop(stat.player_name, None)
+        if fresh is None:
+            db.delete(stat)
+            continue
+        for column in _STAT_COLUMNS:
+            setattr(stat, column, getattr(fresh, column))
+    db.add_all(
+        models.PlayerStat(league_id=league_id, player_name=name, **{column: getattr(fresh, column) for column in _STAT_COLUMNS})
+        for name, fresh in stats.items()
+    )
+
+def rebuild_player_stats(db: Session, league_id: str) -> int:
+    """Repair a league's aggregates and ratings by replaying its matches; returns the row count"""
+    _rebuild_player_stats(db, league_id)
+    ratings.replay_from(db, league_id)
+    _invalidate_stat_snapshots(db, league_id)
+    _touch_league(db, league_id)
+    db.commit()
+    return db.query(models.PlayerStat).filter(models.PlayerStat.league_id == league_id).count()
+
+def _player_stats_row(stat: Any) -> Dict:
+    """A ``schemas.PlayerStats``-shaped dict, ready to serialize as is"""
+    played = int(stat.matches_played)
+    return {
+        "player_name": stat.player_name,
+        "matches_played": played,
+        "matches_won": int(stat.matches_won),
+        "matches_lost": int(stat.matches_lost),
+        "total_score": int(stat.total_score),
+        "win_rate": round(stat.matches_won / played * 100, 2) if played else 0.0,
+        "average_score": round(stat.total_score / played, 2) if played else 0.0,
+        "highest_score": int(stat.highest_score),
+        "win_streak": int(stat.win_streak),
+        "current_streak": int(stat.current_streak),
+        "rating": None,
+    }
+
+def _stats_engine(league_id: str) -> str:
+    return settings.STATS_ENGINE_OVERRIDES.get(league_id, settings.STATS_ENGINE)
+
+def _match_log(db: Session, league_id: str):
+    """This worker's in-memory columns of the league's matches, when it keeps them"""
+    return match_logs.get(db, league_id) if settings.MATCH_LOG_ENABLED else None
+
+# Point-in-time statistics
+def _invalidate_stat_snapshots(
+    db: Session,
+    league_id: str,
+    created_at: Optional[datetime] = None,
+    match_id: str = ""
+) -> None:
+    """Drop snapshots at or after an edited position in history, or all of them"""
+    query = db.query(models.StatSnapshot).filter(models.StatSnapshot.league_id == league_id)
+    if created_at is not None:
+        created_at = _as_utc(created_at)
+        query = query.filter(
+            (models.StatSnapshot.match_created_at > created_at) |
+            ((models.StatSnapshot.match_created_at == created_at) & (models.StatSnapshot.match_id >= match_id))
+        )
+    query.delete(synchronize_session=False)
+
+# Reads hand their snapshots to a thread of their own, so they never commit,
+# roll back or lock through the request's session
+_snapshot_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="versus-snapshots")
+
+def _save_stat_snapshots(league_id: str, version: int, snapshots: List[models.StatSnapshot]) -> None:
+    """Store snapshots built by a read unless a write to the league landed meanwhile"""
+    try:
+        with SessionLocal() as db:
+            current = db.query(models.League.version)\
+                .filter(models.League.id == league_id)\
+                .with_for_update()\
+                .scalar()
+            if current != version:
+                return
+            db.add_all(snapshots)
+            db.commit()
+    except Exception:
+        logger.exception("Storing stat snapshots of league %s failed", league_id)
+
+def _window_match_query(db: Session, league_id: str):
+    return db.query(
+        models.Match.id,
+        models.Match.player1,
+        models.Match.player2,
+        models.Match.player1_score,
+        models.Match.player2_score,
+        models.Match.winner,
+        models.Match.created_at
+    ).filter(models.Match.league_id == league_id)
+
+def _apply_window_match(stats: Dict[str, _StatAccumulator], match: Any) -> None:
+    for name, score in ((match.player1, match.player1_score), (match.player2, match.player2_score)):
+        if name not in stats:
+            stats[name] = _StatAccumulator(name)
+        _apply_result(stats[name], score, match.winner == name)
+
+def _stats_until(db: Session, league_id: str, until: Optional[datetime]) -> Dict[str, _StatAccumulator]:
+    """Aggregates over every match up to ``until``.
+
+    Starts from the latest snapshot at or before ``until`` and replays the
+    matches after it, storing new snapshots every STATS_SNAPSHOT_INTERVAL
+    matches on the way so later reads of nearby dates start closer.
+    """
+    version = get_league_version(db, league_id)
+    snapshot_query = db.query(models.StatSnapshot).filter(models.StatSnapshot.league_id == league_id)
+    match_query = _window_match_query(db, league_id)
+    if until is not None:
+        snapshot_query = snapshot_query.filter(models.StatSnapshot.match_created_at <= until)
+        match_query = match_query.filter(models.Match.created_at <= until)
+    snapshot = snapshot_query\
+        .order_by(models.StatSnapshot.match_created_at.desc(), models.StatSnapshot.match_id.desc())\
+        .first()
+
+    stats: Dict[str, _StatAccumulator] = {}
+    matches_applied = 0
+    if snapshot is not None:
+        for name, values in snapshot.stats.items():
+            stats[name] = _StatAccumulator(name, values)
+        matches_applied = snapshot.matches_applied
+        created_at = _as_utc(snapshot.match_created_at)
+        match_query = match_query.filter(
+            (models.Match.created_at > created_at) |
+            ((models.Match.created_at == created_at) & (models.Match.id > snapshot.match_id))
+        )
+
+    snapshots = []
+    interval = settings.STATS_SNAPSHOT_INTERVAL
+    for match in match_query.order_by(models.Match.created_at.asc(), models.Match.id.asc()).yield_per(5000):
+        _apply_window_match(stats, match)
+        matches_applied += 1
+        if matches_applied % interval == 0:
+            snapshots.append(models.StatSnapshot(
+                league_id=league_id,
+                match_created_at=match.created_at,
+                match_id=match.id,
+                matches_applied=matches_applied,
+                stats={
+                    name: [getattr(stat, column) for column in _STAT_COLUMNS]
+                    for name, stat in stats.items()
+                }
+            ))
+    # Replicas are read-only; a later read on the primary stores the snapshots
+    if snapshots and version is not None and not db.info.get("replica"):
+        _snapshot_writer.submit(_save_stat_snapshots, league_id, version, snapshots)
+    return stats
+
+def _window_stats(
+    db: Session,
+    league_id: str,
+    since: Optional[datetime],
+    until: Optional[datetime]
+) -> Dict[str, _StatAccumulator]:
+    """Per-player aggregates over matches played between ``since`` and ``until``, inclusive.
+
+    Windows with a start scan just their matches through the (league_id,
+    created_at) index; open-ended ones come from ``_stats_until``. Players
+    registered by ``until`` are included even without matches in the window.
+    """
+    since = _as_utc(since) if since is not None else None
+    until = _as_utc(until) if until is not None else None
+
+    if since is None:
+        stats = _stats_until(db, league_id, until)
+    else:
+        stats = {}
+        match_query = _window_match_query(db, league_id).filter(models.Match.created_at >= since)
+        if until is not None:
+            match_query = match_query.filter(models.Match.created_at <= until)
+        for match in match_query.order_by(models.Match.created_at.asc(), models.Match.id.asc()).yield_per(5000):
+            _apply_window_match(stats, match)
+
+    player_query = db.query(models.Player.name).filter(models.Player.league_id == league_id)
+    if until is not None:
+        player_query = player_query.filter(models.Player.created_at <= until)
+    for (name,) in player_query:
+        if name not in stats:
+            stats[name] = _StatAccumulator(name)
+    return stats
+
+def _player_stat_rows(
+    db: Session,
+    league_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> List[Any]:
+    """Per-player aggregates for the whole history or a window, leaving out players being deleted"""
+    rows = _engine_stat_rows(db, league_id, since, until)
+    hidden = _hidden_players(db, league_id)
+    return [row for row in rows if row.player_name not in hidden] if hidden else rows
+
+def _engine_stat_rows(
+    db: Session,
+    league_id: str,
+    since: Optional[datetime],
+    until: Optional[datetime]
+) -> List[Any]:
+    """Per-player aggregates for the whole history or a window, whichever engine serves them"""
+    if since is not None or until is not None:
+        since, until = (_as_utc(value) if value is not None else None for value in (since, until))
+        log = _match_log(db, league_id)
+        if log is not None:
+            window = log.window(since, until)
+            return numpy_stats.stat_rows(
+                window.player_keys,
+                window.player_names,
+                window.registered_by(until),
+                window.player1,
+                window.player2,
+                window.score1,
+                window.score2,
+                window.winner_side
             )
-    
-    # Calculate statistics for each player
-    for player_name, stats in player_stats.items():
-        if stats.matches_played > 0:
-            # Calculate win rate and average score
-            stats.win_rate = round(stats.matches_won / stats.matches_played * 100, 2)
-            stats.average_score = round(stats.total_score / stats.matches_played, 2)
-            
-            # Calculate streaks
-            streak_list = player_streaks[player_name]
-            if streak_list:
-                # Calculate current streak
-                current_streak = 1
-                for i in range(len(streak_list)-1, 0, -1):
-                    if streak_list[i] == streak_list[i-1]:
-                        current_streak += 1
-                    else:
-                        break
-                stats.current_streak = current_streak if streak_list[-1] else -current_streak
-                
-                # Calculate longest win streak
-                max_streak = 0
-                current = 0
-                for won in streak_list:
-                    if won:
-                        current += 1
-                        max_streak = max(max_streak, current)
-                    else:
-                        current = 0
-                stats.win_streak = max_streak
-    
-    # Sort by win rate and return as list
-    return sorted(
-        player_stats.values(),
-        key=lambda x: (-x.win_rate, -x.matches_won, -x.average_score, -x.highest_score, x.player_name)
+        if _stats_engine(league_id) == "numpy":
+            return numpy_stats.get_player_stat_rows(db, league_id, since, until)
+        return list(_window_stats(db, league_id, since, until).values())
+    if _stats_engine(league_id) == "sql":
+        return sql_stats.get_player_stat_rows(db, league_id)
+    # Plain rows rather than ORM instances; these are only read
+    return db.query(models.PlayerStat.player_name, *(getattr(models.PlayerStat, column) for column in _STAT_COLUMNS))\
+        .filter(models.PlayerStat.league_id == league_id)\
+        .all()
+
+def _league_stats_from_rows(stats: List[Any]) -> Dict:
+    # Every match adds one result for each side
+    total_matches = sum(stat.matches_played for stat in stats) // 2
+    total_score = sum(stat.total_score for stat in stats)
+    return {
+        "total_matches": total_matches,
+        "total_players": len(stats),
+        "average_score": total_score / (total_matches * 2) if total_matches else 0,
+        "highest_score": max((stat.highest_score for stat in stats), default=0)
+    }
+
+@cached("rankings")
+def get_rankings(
+    db: Session,
+    league_id: str,
+    sort: str = "win_rate",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[Dict]:
+    """Rankings over the whole history, or over matches between ``since`` and ``until``.
+
+    Rows are ``schemas.PlayerStats``-shaped dicts. With ``limit`` only that
+    many rows from ``offset`` on are returned.
+    """
+    return _rank(db, league_id, _player_stat_rows(db, league_id, since, until), sort, until, limit, offset)
+
+def _ranking_rows(db: Session, league_id: str, stats: List[Any], until: Optional[datetime]) -> List[Dict]:
+    """Unordered ranking rows with each player's rating"""
+    rankings = [_player_stats_row(stat) for stat in stats]
+    # Windowed rankings carry each player's rating as of the window's end
+    player_ratings = ratings.get_ratings(db, league_id, until)
+    for player in rankings:
+        player["rating"] = round(player_ratings.get(player["player_name"], settings.RATING_INITIAL), 1)
+    return rankings
+
+def _ranking_key(sort: str) -> Callable[[Dict], Tuple]:
+    """Sort key by win rate (or rating); the name makes every key unique"""
+    if sort == "rating":
+        return lambda x: (-x["rating"], -x["win_rate"], x["player_name"])
+    return lambda x: (-x["win_rate"], -x["matches_won"], -x["average_score"], -x["highest_score"], x["player_name"])
+
+def _rank(
+    db: Session,
+    league_id: str,
+    stats: List[Any],
+    sort: str,
+    until: Optional[datetime],
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[Dict]:
+    rankings = _ranking_rows(db, league_id, stats, until)
+    key = _ranking_key(sort)
+    if limit is None:
+        return sorted(rankings, key=key)[offset:]
+    # A page near the top only needs a heap of offset + limit rows, not a full sort
+    return heapq.nsmallest(offset + limit, rankings, key=key)[offset:]
+
+@cached("player_rank")
+def get_player_rank(
+    db: Session,
+    league_id: str,
+    player_name: str,
+    sort: str = "win_rate",
+    neighbors: int = 2,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Optional[Dict]:
+    """A player's position in the rankings, with up to ``neighbors`` players on either side.
+
+    The rank is the number of players whose key sorts first, so nobody is
+    sorted apart from the few neighbors.
+    """
+    rankings = _ranking_rows(db, league_id, _player_stat_rows(db, league_id, since, until), until)
+    key = _ranking_key(sort)
+    player = next((row for row in rankings if row["player_name"] == player_name), None)
+    if player is None:
+        return None
+
+    target = key(player)
+    keyed = [(key(row), row) for row in rankings]
+    ahead = [entry for entry in keyed if entry[0] < target]
+    rank = len(ahead) + 1
+    above = [row for _, row in heapq.nlargest(neighbors, ahead, key=lambda entry: entry[0])][::-1]
+    below = [row for _, row in heapq.nsmallest(
+        neighbors, (entry for entry in keyed if entry[0] > target), key=lambda entry: entry[0]
+    )]
+    return {
+        "rank": rank,
+        "total_players": len(rankings),
+        "player": {**player, "rank": rank},
+        "above": [{**row, "rank": rank - len(above) + i} for i, row in enumerate(above)],
+        "below": [{**row, "rank": rank + 1 + i} for i, row in enumerate(below)],
+    }
+
+_PlayerHistory = namedtuple("_PlayerHistory", [
+    "key", "player1", "player2", "score1", "score2", "winner_side", "created_at", "names"
+])
+
+def _player_history(db: Session, league_id: str, player_name: str) -> Optional[_PlayerHistory]:
+    """A player's matches, oldest first, as columns.
+
+    ``created_at`` maps a match's index to its date and ``names`` maps the
+    keys of everyone they played to names. None for an unknown player or one
+    being deleted.
+    """
+    if player_name in _hidden_players(db, league_id):
+        return None
+    log = _match_log(db, league_id)
+    if log is not None:
+        try:
+            key = log.player_keys[log.player_names.index(player_name)]
+        except ValueError:
+            return None
+        indexes = np.flatnonzero((log.player1 == key) | (log.player2 == key))
+        player1, player2 = log.player1[indexes], log.player2[indexes]
+        keys = np.union1d(player1, player2)
+        return _PlayerHistory(
+            key=key,
+            player1=player1,
+            player2=player2,
+            score1=log.score1[indexes],
+            score2=log.score2[indexes],
+            winner_side=log.winner_side[indexes],
+            created_at=lambda index: log.created_at_value(indexes[index]),
+            names={
+                int(other): log.player_names[code]
+                for other, code in zip(keys, np.searchsorted(log.player_keys, keys))
+            }
+        )
+
+    key = _player_key(db, league_id, player_name)
+    if key is None:
+        return None
+    matches = db.query(
+        models.Match.player1_id,
+        models.Match.player2_id,
+        models.Match.player1_score,
+        models.Match.player2_score,
+        models.Match.winner_side,
+        models.Match.created_at,
+        models.Match.player1,
+        models.Match.player2
+    ).filter(models.Match.league_id == league_id)\
+        .filter(_player_filter(key))\
+        .order_by(models.Match.created_at.asc(), models.Match.id.asc())\
+        .all()
+    columns = np.array([match[:5] for match in matches], dtype=np.int64).reshape(len(matches), 5)
+    return _PlayerHistory(
+        key,
+        *columns.T,
+        created_at=lambda index: matches[index].created_at,
+        names={
+            **{match.player1_id: match.player1 for match in matches},
+            **{match.player2_id: match.player2 for match in matches}
+        }
     )
 
+_PlayerResults = namedtuple("_PlayerResults", ["match", "score", "opponent_score", "won", "opponent"])
+
+def _player_results(history: _PlayerHistory) -> _PlayerResults:
+    """One result per side the player took in each match.
+
+    Player 1's side comes first, and self-matches count as a win for both
+    sides, as in the aggregates behind the rankings.
+    """
+    side1, side2 = history.player1 == history.key, history.player2 == history.key
+    taken = np.column_stack((side1, side2)).ravel()
+    same = history.player1 == history.player2
+    won = np.column_stack(((history.winner_side == 1) | same, (history.winner_side == 2) | same))
+
+    def results(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        return np.column_stack((first, second)).ravel()[taken]
+
+    return _PlayerResults(
+        match=np.repeat(np.arange(len(side1)), 2)[taken],
+        score=results(history.score1, history.score2),
+        opponent_score=results(history.score2, history.score1),
+        won=won.ravel()[taken],
+        opponent=results(history.player2, history.player1)
+    )
+
+def _player_summary(db: Session, league_id: str, player_name: str, results: _PlayerResults) -> Dict:
+    stats = _player_stats_row(numpy_stats.player_stat_row(player_name, results.score, results.won))
+    rating = db.query(models.PlayerRating.rating)\
+        .filter(models.PlayerRating.league_id == league_id)\
+        .filter(models.PlayerRating.player_name == player_name)\
+        .scalar()
+    stats["rating"] = round(rating if rating is not None else settings.RATING_INITIAL, 1)
+    return stats
+
+@cached("player_stats")
 def get_player_stats(
     db: Session,
     league_id: str,
     player_name: str
-) -> Optional[schemas.PlayerStats]:
-    matches = db.query(models.Match)\
-        .filter(models.Match.league_id == league_id)\
-        .filter((models.Match.player1 == player_name) | (models.Match.player2 == player_name))\
-        .all()
-    
-    if not matches:
+) -> Optional[Dict]:
+    """A ``schemas.PlayerStats``-shaped dict, or None for an unknown player"""
+    history = _player_history(db, league_id, player_name)
+    if history is None:
         return None
-    
-    stats = schemas.PlayerStats(player_name=player_name)
-    
-    for match in matches:
-        stats.matches_played += 1
-        if match.player1 == player_name:
-            stats.total_score += match.player1_score
-            if match.winner == player_name:
-                stats.matches_won += 1
-            else:
-                stats.matches_lost += 1
-        else:
-            stats.total_score += match.player2_score
-            if match.winner == player_name:
-                stats.matches_won += 1
-            else:
-                stats.matches_lost += 1
-    
-    stats.win_rate = stats.matches_won / stats.matches_played if stats.matches_played > 0 else 0.0
-    return stats
+    return _player_summary(db, league_id, player_name, _player_results(history))
+
+def _opponent_records(results: _PlayerResults, names: Dict[int, str]) -> List[Dict]:
+    """Record against each opponent, most played first"""
+    opponents, codes = np.unique(results.opponent, return_inverse=True)
+    played = np.bincount(codes, minlength=len(opponents))
+    wins = np.bincount(codes[results.won], minlength=len(opponents))
+    scored = np.bincount(codes, weights=results.score, minlength=len(opponents))
+    conceded = np.bincount(codes, weights=results.opponent_score, minlength=len(opponents))
+    records = [
+        {
+            "opponent": names[int(opponent)],
+            "matches_played": int(played[code]),
+            "matches_won": int(wins[code]),
+            "matches_lost": int(played[code] - wins[code]),
+            "win_rate": round(float(wins[code] / played[code] * 100), 2),
+            "average_score": round(float(scored[code] / played[code]), 2),
+            "average_opponent_score": round(float(conceded[code] / played[code]), 2),
+        }
+        for code, opponent in enumerate(opponents)
+    ]
+    return sorted(records, key=lambda x: (-x["matches_played"], x["opponent"]))
+
+def _downsampled(values: np.ndarray, points: int, history: _PlayerHistory, results: _PlayerResults) -> List[Dict]:
+    number = np.arange(1, len(values) + 1)
+    return [
+        {
+            "match": int(number[index]),
+            "created_at": history.created_at(int(results.match[index])),
+            "value": round(float(values[index]), 2),
+        }
+        for index in series.lttb(number, values, points)
+    ]
+
+@cached("player_profile")
+def get_player_profile(
+    db: Session,
+    league_id: str,
+    player_name: str,
+    window: int = 10,
+    points: int = 100
+) -> Optional[Dict]:
+    """Stats, per-opponent records and rolling form of one player.
+
+    The series hold the win rate and average score over each result's last
+    ``window`` results, downsampled to at most ``points`` points each.
+    """
+    history = _player_history(db, league_id, player_name)
+    if history is None:
+        return None
+    results = _player_results(history)
+    return {
+        "stats": _player_summary(db, league_id, player_name, results),
+        "opponents": _opponent_records(results, history.names),
+        "series": {
+            "window": window,
+            "matches": len(results.won),
+            "win_rate": _downsampled(series.rolling_mean(results.won * 100.0, window), points, history, results),
+            "average_score": _downsampled(series.rolling_mean(results.score, window), points, history, results),
+        },
+    }
+
+_LoggedMatch = namedtuple("_LoggedMatch", [
+    "id", "created_at", "player1", "player2", "player1_score", "player2_score", "winner"
+])
 
+def _logged_head_to_head(log: Any, player1: str, player2: str) -> List[_LoggedMatch]:
+    """Matches between two players, read from a league's match log"""
+    codes = {name: code for code, name in enumerate(log.player_names)}
+    if player1 not in codes or player2 not in codes:
+        return []
+    key1, key2 = log.player_keys[codes[player1]], log.player_keys[codes[player2]]
+    indexes = np.flatnonzero(
+        ((log.player1 == key1) & (log.player2 == key2)) |
+        ((log.player1 == key2) & (log.player2 == key1))
+    )
+    matches = []
+    for index in indexes:
+        names = (
+            log.player_names[np.searchsorted(log.player_keys, log.player1[index])],
+            log.player_names[np.searchsorted(log.player_keys, log.player2[index])]
+        )
+        matches.append(_LoggedMatch(
+            id=log.match_id(index),
+            created_at=log.created_at_value(index),
+            player1=names[0],
+            player2=names[1],
+            player1_score=int(log.score1[index]),
+            player2_score=int(log.score2[index]),
+            winner=names[log.winner_side[index] - 1]
+        ))
+    return matches
+
+@cached("head_to_head")
 def get_head_to_head(
     db: Session,
     league_id: str,
     player1: str,
     player2: str
 ) -> Dict:
-    matches = db.query(models.Match)\
-        .filter(models.Match.league_id == league_id)\
-        .filter(
-            ((models.Match.player1 == player1) & (models.Match.player2 == player2)) |
-            ((models.Match.player1 == player2) & (models.Match.player2 == player1))
-        )\
-        .all()
+    log = _match_log(db, league_id)
+    if log is not None:
+        matches = _logged_head_to_head(log, player1, player2)
+    else:
+        key1 = _player_key(db, league_id, player1)
+        key2 = _player_key(db, league_id, player2)
+        matches = db.query(models.Match)\
+            .filter(models.Match.league_id == league_id)\
+            .filter(
+                ((models.Match.player1_id == key1) & (models.Match.player2_id == key2)) |
+                ((models.Match.player1_id == key2) & (models.Match.player2_id == key1))
+            )\
+            .all() if key1 is not None and key2 is not None else []
     
     total_matches = len(matches)
     player1_wins = 0
@@ -325,18 +1211,97 @@ def get_head_to_head(
     
     return stats
 
+@cached("head_to_head_matrix")
+def get_head_to_head_matrix(
+    db: Session,
+    league_id: str,
+    players: Optional[Tuple[str, ...]] = None
+) -> Dict:
+    """Pairwise records of a league's players from a single pass over its matches.
+
+    Players are indexed in sorted name order. ``wins[i][j]`` counts wins of
+    ``players[i]`` over ``players[j]``, ``matches`` is symmetric and
+    ``score_difference[i][j]`` is i's average margin against j.
+    """
+    query = db.query(
+        models.Match.player1,
+        models.Match.player2,
+        models.Match.player1_score,
+        models.Match.player2_score,
+        models.Match.winner
+    ).filter(models.Match.league_id == league_id)
+
+    if players is not None:
+        names = sorted(set(players))
+        query = query.filter(models.Match.player1.in_(names), models.Match.player2.in_(names))
+        rows = query.all()
+    else:
+        rows = query.all()
+        registered = db.query(models.Player.name).filter(models.Player.league_id == league_id)
+        names = sorted({name for row in rows for name in row[:2]} | {name for (name,) in registered})
+
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+    # Flat row-major n*n arrays keep large leagues compact while counting
+    wins = array("l", bytes(array("l").itemsize * n * n))
+    played = array("l", wins)
+    margin = array("q", bytes(array("q").itemsize * n * n))
+
+    for player1, player2, score1, score2, winner in rows:
+        i, j = index[player1], index[player2]
+        ij, ji = i * n + j, j * n + i
+        if winner == player1:
+            wins[ij] += 1
+        else:
+            wins[ji] += 1
+        played[ij] += 1
+        margin[ij] += score1 - score2
+        if ij != ji:
+            played[ji] += 1
+            margin[ji] += score2 - score1
+
+    return {
+        "players": names,
+        "wins": [wins[i * n:(i + 1) * n].tolist() for i in range(n)],
+        "matches": [played[i * n:(i + 1) * n].tolist() for i in range(n)],
+        "score_difference": [
+            [round(margin[k] / played[k], 2) if played[k] else 0.0 for k in range(i * n, (i + 1) * n)]
+            for i in range(n)
+        ]
+    }
+
 def get_recent_matches(
     db: Session,
     league_id: str,
     limit: int = 10
-) -> List[models.Match]:
-    return db.query(models.Match)\
-        .filter(models.Match.league_id == league_id)\
-        .order_by(desc(models.Match.created_at))\
-        .limit(limit)\
-        .all()
+) -> List[Row]:
+    return get_matches(db, league_id, limit=limit)
+
+@cached("league_stats")
+def get_league_stats(
+    db: Session,
+    league_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Dict:
+    if since is not None or until is not None:
+        return _league_stats_from_rows(_player_stat_rows(db, league_id, since, until))
+
+    log = _match_log(db, league_id)
+    if log is not None:
+        total_score = int(log.score1.sum() + log.score2.sum())
+        return {
+            "total_matches": log.size,
+            "total_players": len(log.player_names),
+            "average_score": total_score / (log.size * 2) if log.size else 0,
+            "highest_score": int(max(log.score1.max(initial=0), log.score2.max(initial=0)))
+        }
+
+    if _stats_engine(league_id) == "sql":
+        return sql_stats.get_league_stats(db, league_id)
+    if _stats_engine(league_id) == "numpy":
+        return _league_stats_from_rows(numpy_stats.get_player_stat_rows(db, league_id))
 
-def get_league_stats(db: Session, league_id: str) -> Dict:
     matches = db.query(models.Match)\
         .filter(models.Match.league_id == league_id)\
         .all()
@@ -368,8 +1333,50 @@ def get_league_stats(db: Session, league_id: str) -> Dict:
         "highest_score": highest_score
     }
 
+DASHBOARD_VIEWS = ("stats", "rankings", "player_stats", "recent")
+
+@cached("dashboard")
+def get_dashboard(
+    db: Session,
+    league_id: str,
+    include: Tuple[str, ...] = DASHBOARD_VIEWS,
+    recent_limit: int = 10,
+    sort: str = "win_rate",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Dict:
+    """The league page's views in one call.
+
+    Stats, rankings and player stats are all derived from a single read of the
+    per-player aggregates, so none of them scans the match table; recent
+    matches are one LIMIT query on the (league_id, created_at) index.
+    """
+    dashboard = {}
+    if {"stats", "rankings", "player_stats"} & set(include):
+        stats = _player_stat_rows(db, league_id, since, until)
+        if "stats" in include:
+            dashboard["stats"] = _league_stats_from_rows(stats)
+        if {"rankings", "player_stats"} & set(include):
+            rankings = _rank(db, league_id, stats, sort, until)
+            # The player stats page lists the same rows as the rankings
+            for view in ("rankings", "player_stats"):
+                if view in include:
+                    dashboard[view] = rankings
+    if "recent" in include:
+        dashboard["recent"] = [match._asdict() for match in get_recent_matches(db, league_id, recent_limit)]
+    return dashboard
+
 def get_players_by_league(db: Session, league_id: str) -> List[models.Player]:
-    return db.query(models.Player).filter(models.Player.league_id == league_id).all()
+    return db.query(models.Player)\
+        .filter(models.Player.league_id == league_id)\
+        .filter(models.Player.deleted_at.is_(None))\
+        .all()
+
+def get_player_by_name(db: Session, league_id: str, name: str) -> Optional[models.Player]:
+    return db.query(models.Player)\
+        .filter(models.Player.league_id == league_id)\
+        .filter(models.Player.name == name)\
+        .first()
 
 def create_player(db: Session, league_id: str, name: str) -> models.Player:
     db_player = models.Player(
@@ -378,26 +1385,154 @@ def create_player(db: Session, league_id: str, name: str) -> models.Player:
         league_id=league_id
     )
     db.add(db_player)
+    _stat_state(db, league_id)
+    if db.get(models.PlayerStat, (league_id, name)) is None:
+        _add_player_stats(db, league_id, {name})
+    _touch_league(db, league_id)
+    _emit(db, league_id, "player_created", {"name": name})
     db.commit()
     db.refresh(db_player)
     return db_player
 
-def delete_player(db: Session, league_id: str, player_name: str) -> bool:
-    try:
-        # Delete all matches involving this player
-        db.query(models.Match)\
-            .filter(models.Match.league_id == league_id)\
-            .filter((models.Match.player1 == player_name) | (models.Match.player2 == player_name))\
-            .delete()
-        
-        # Delete the player
-        result = db.query(models.Player)\
-            .filter(models.Player.league_id == league_id)\
-            .filter(models.Player.name == player_name)\
-            .delete()
-        
+def _unfinished_delete_player_job(db: Session, league_id: str, player_name: str) -> Optional[models.Job]:
+    """The player's queued, running or failed deletion job, if any"""
+    unfinished = db.query(models.Job)\
+        .filter(models.Job.kind == "delete_player")\
+        .filter(models.Job.league_id == league_id)\
+        .filter(models.Job.status.in_(("queued", "running", "failed")))\
+        .order_by(models.Job.created_at.desc())\
+        .all()
+    return next((job for job in unfinished if job.params.get("player_name") == player_name), None)
+
+def delete_player(db: Session, league_id: str, player_name: str) -> Optional[models.Job]:
+    """Hide a player and queue the job that deletes them and every match they played.
+
+    A player already being deleted keeps their job. A failed one is queued
+    again with the opponents and first match it saved, so the rerun still
+    repairs the stats of the matches its earlier run deleted.
+    """
+    db_player = get_player_by_name(db, league_id, player_name)
+    if db_player is None:
+        return None
+    job = _unfinished_delete_player_job(db, league_id, player_name)
+    if job is None:
+        db_player.deleted_at = datetime.now(timezone.utc)
+        job = jobs.enqueue(db, "delete_player", league_id, {"player_name": player_name})
+        _touch_league(db, league_id)
+    elif job.status == "failed":
+        jobs.requeue(db, job)
+    db.commit()
+    return job
+
+# Background jobs
+def _delete_in_batches(db: Session, job: models.Job, model: Any, key: Any, condition: Any) -> None:
+    """Delete matching rows JOBS_DELETE_BATCH_SIZE at a time, committing each batch.
+
+    Short transactions keep locks brief.
+    """
+    while True:
+        batch = select(key).where(condition).limit(settings.JOBS_DELETE_BATCH_SIZE)
+        deleted = db.execute(
+            delete(model).where(key.in_(batch)).execution_options(synchronize_session=False)
+        ).rowcount
+        jobs.advance(job, deleted)
         db.commit()
-        return True
-    except Exception:
-        db.rollback()
-        return False 
\ No newline at end of file
+        if deleted < settings.JOBS_DELETE_BATCH_SIZE:
+            return
+
+@jobs.handler("delete_league")
+def _delete_league_job(db: Session, job: models.Job) -> None:
+    league_id = job.league_id
+    matches = models.Match.league_id == league_id
+    players = models.Player.league_id == league_id
+    job.total = db.query(func.count(models.Match.id)).filter(matches).scalar()\
+        + db.query(func.count(models.Player.pk)).filter(players).scalar()
+    db.commit()
+
+    _delete_in_batches(db, job, models.Match, models.Match.id, matches)
+    _delete_in_batches(db, job, models.Player, models.Player.pk, players)
+
+    # The rest is small; rows written while the batches ran go along with it
+    db.query(models.Match).filter(matches).delete(synchronize_session=False)
+    db.query(models.Player).filter(players).delete(synchronize_session=False)
+    db.query(models.PlayerStat).filter(models.PlayerStat.league_id == league_id).delete(synchronize_session=False)
+    db.query(models.StatState).filter(models.StatState.league_id == league_id).delete(synchronize_session=False)
+    ratings.delete_league(db, league_id)
+    _invalidate_stat_snapshots(db, league_id)
+    _touch_league(db, league_id)
+    db.query(models.League).filter(models.League.id == league_id).delete(synchronize_session=False)
+    db.commit()
+
+@jobs.handler("delete_player")
+def _delete_player_job(db: Session, job: models.Job) -> None:
+    league_id, player_name = job.league_id, job.params["player_name"]
+    key = _player_key(db, league_id, player_name)
+    if key is None:
+        # Already deleted, by an earlier run of this job or another one
+        return
+    matches = (models.Match.league_id == league_id) & _player_filter(key)
+    job.total = db.query(func.count(models.Match.id)).filter(matches).scalar()
+
+    # Opponents lose these matches too, so their aggregates and the ratings from
+    # the first of them on need a rebuild. Both are saved on the job before any
+    # batch commits, so a rerun after a failure still repairs what the earlier
+    # run already deleted.
+    opponents = set(job.params.get("opponents", ()))
+    first_match = datetime.fromisoformat(job.params["first_match"]) if job.params.get("first_match") else None
+    for pair in db.query(models.Match.player1, models.Match.player2).filter(matches).distinct():
+        opponents.update(pair)
+    earliest = db.query(func.min(models.Match.created_at)).filter(matches).scalar()
+    if earliest is not None and (first_match is None or _as_utc(earliest) < _as_utc(first_match)):
+        first_match = earliest
+    job.params = {
+        **job.params,
+        "opponents": sorted(opponents),
+        "first_match": first_match.isoformat() if first_match else None,
+    }
+    db.commit()
+
+    _delete_in_batches(db, job, models.Match, models.Match.id, matches)
+    # Matches recorded while the batches ran go in this last transaction
+    for player1, player2, created_at in db.execute(
+        delete(models.Match)
+        .where(matches)
+        .returning(models.Match.player1, models.Match.player2, models.Match.created_at)
+        .execution_options(synchronize_session=False)
+    ):
+        opponents.update((player1, player2))
+        if first_match is None or _as_utc(created_at) < _as_utc(first_match):
+            first_match = created_at
+    affected_players = opponents - {player_name}
+
+    db.query(models.Player)\
+        .filter(models.Player.league_id == league_id)\
+        .filter(models.Player.name == player_name)\
+        .delete(synchronize_session=False)
+    db.query(models.PlayerStat)\
+        .filter(models.PlayerStat.league_id == league_id)\
+        .filter(models.PlayerStat.player_name == player_name)\
+        .delete(synchronize_session=False)
+    with jobs.heartbeat(job):
+        _rebuild_player_stats(db, league_id, affected_players)
+        if first_match is not None:
+            # The empty id sorts before every match stamped at the same instant
+            ratings.replay_from_match(db, league_id, first_match, "")
+            _invalidate_stat_snapshots(db, league_id, first_match)
+
+    _touch_league(db, league_id)
+    _emit(db, league_id, "player_deleted", {"name": player_name})
+    db.commit()
+
+def rebuild_league_stats(db: Session, league_id: str) -> Optional[models.Job]:
+    """Queue a rebuild of the league's aggregates and ratings"""
+    if get_league(db, league_id) is None:
+        return None
+    job = jobs.enqueue(db, "rebuild_stats", league_id)
+    db.commit()
+    return job
+
+@jobs.handler("rebuild_stats")
+def _rebuild_stats_job(db: Session, job: models.Job) -> None:
+    # One transaction, however long the league's history
+    with jobs.heartbeat(job):
+        job.total = job.progress = rebuild_player_stats(db, job.league_id)
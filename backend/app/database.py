@@ -1,27 +1,232 @@
+import functools
+
+from anyio import CapacityLimiter, to_thread
 from sqlalchemy import create_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.functions import now
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from typing import Any, AsyncIterator, Callable, Iterator, Literal, Optional, Sequence, TypeVar, Union
+from . import pool_metrics, profiling
+
+StatsEngine = Literal["orm", "sql", "numpy"]
 
 class Settings(BaseSettings):
     PROJECT_NAME: str
     VERSION: str
-    POSTGRES_USER: str
-    POSTGRES_PASSWORD: str
-    POSTGRES_SERVER: str
-    POSTGRES_PORT: str
-    POSTGRES_DB: str
+    # Not needed when DATABASE_URL is set
+    POSTGRES_USER: Optional[str] = None
+    POSTGRES_PASSWORD: Optional[str] = None
+    POSTGRES_SERVER: Optional[str] = None
+    POSTGRES_PORT: Optional[str] = None
+    POSTGRES_DB: Optional[str] = None
     ALLOWED_ORIGINS: list[str] = ["http://localhost:3000"]
+    # Full database URL, e.g. sqlite:///./versus.db; overrides the POSTGRES_* settings
+    DATABASE_URL: Optional[str] = None
+    # Read-only replica for GET routes; a client's reads go to the primary for
+    # READ_YOUR_WRITES_SECONDS after each of its writes
+    READ_DATABASE_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 5
+    # Statistics engine: "orm" aggregates in Python, "sql" lets Postgres do it,
+    # "numpy" computes windowed rankings and league stats over columnar arrays
+    STATS_ENGINE: StatsEngine = "orm"
+    # Per-league engine overrides, e.g. {"<league_id>": "sql"}
+    STATS_ENGINE_OVERRIDES: dict[str, StatsEngine] = {}
+    # Serve requests through an asyncpg AsyncSession instead of a blocking Session
+    ASYNC_DB: bool = False
+    # Connection pool, per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # League-scoped read cache; the TTL bounds staleness across workers
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 2048
+    CACHE_TTL_SECONDS: float = 10
+    # Elo rating engine; a checkpoint of every rating is stored each N matches
+    RATING_INITIAL: float = 1500
+    RATING_K_FACTOR: float = 32
+    RATING_CHECKPOINT_INTERVAL: int = 1000
+    # Point-in-time stats replay from a per-league snapshot stored each N matches
+    STATS_SNAPSHOT_INTERVAL: int = 1000
+    # Request profiling: Server-Timing headers and a JSON log line per request
+    PROFILING_ENABLED: bool = True
+    # Share of requests run under cProfile; profiles slower than PROFILE_SLOW_MS are kept
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_SLOW_MS: float = 500
+    PROFILE_DIR: str = "profiles"
+    # Per-worker in-memory log of hot leagues' matches, bounded in total matches
+    MATCH_LOG_ENABLED: bool = True
+    MATCH_LOG_MAX_MATCHES: int = 1000000
+    # League event streams (SSE); slow clients past the queue size are told to resync
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_KEEPALIVE_SECONDS: float = 15
+    # Background jobs (league and player deletion, stats rebuilds): worker threads
+    # per process, how often idle workers poll, rows deleted per transaction, and
+    # how long a running job may go without a heartbeat before another worker takes over
+    JOBS_WORKERS: int = 1
+    JOBS_POLL_SECONDS: float = 5
+    JOBS_DELETE_BATCH_SIZE: int = 5000
+    JOBS_STALE_SECONDS: float = 300
+    # Group commit for POST /matches: submissions to a league within the window
+    # (or until the batch is full) share one transaction
+    MATCH_COALESCE_ENABLED: bool = False
+    MATCH_COALESCE_WINDOW_MS: float = 5
+    MATCH_COALESCE_MAX_BATCH: int = 200
+
+    @model_validator(mode="after")
+    def _database_configured(self) -> "Settings":
+        postgres = (self.POSTGRES_USER, self.POSTGRES_PASSWORD, self.POSTGRES_SERVER, self.POSTGRES_PORT, self.POSTGRES_DB)
+        if not self.DATABASE_URL and None in postgres:
+            raise ValueError("Set DATABASE_URL or all of the POSTGRES_* settings")
+        return self
 
     @property
     def SQLALCHEMY_DATABASE_URL(self) -> str:
+        if self.DATABASE_URL:
+            return _normalized_url(self.DATABASE_URL)
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URL(self) -> str:
+        return _async_url(self.SQLALCHEMY_DATABASE_URL)
+
+    @property
+    def SQLALCHEMY_ASYNC_READ_DATABASE_URL(self) -> Optional[str]:
+        return _async_url(_normalized_url(self.READ_DATABASE_URL)) if self.READ_DATABASE_URL else None
+
     class Config:
         env_file = ".env"
 
+def _normalized_url(url: str) -> str:
+    # Hosting providers hand out postgres:// URLs, which SQLAlchemy does not accept
+    return url.replace("postgres://", "postgresql://", 1) if url.startswith("postgres://") else url
+
+def _async_url(url: str) -> str:
+    return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
 settings = Settings()
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URL)
+def pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def _connect_args(url: str) -> dict:
+    # SQLite connections are handed between threadpool threads
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+@compiles(now, "sqlite")
+def _sqlite_now(element: now, compiler: Any, **kw: Any) -> str:
+    # CURRENT_TIMESTAMP stores whole seconds without the fraction SQLAlchemy
+    # writes for bound datetimes, so equal instants compared unequal as text
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
+
+def _engine(url: str, name: str):
+    engine = create_engine(
+        url,
+        poolclass=pool_metrics.TimedQueuePool,
+        connect_args=_connect_args(url),
+        **pool_options()
+    )
+    pool_metrics.instrument(engine, name)
+    profiling.instrument(engine)
+    return engine
+
+def _async_engine(url: str, name: str):
+    engine = create_async_engine(
+        url,
+        poolclass=pool_metrics.TimedAsyncAdaptedQueuePool,
+        connect_args=_connect_args(url),
+        **pool_options()
+    )
+    pool_metrics.instrument(engine.sync_engine, name)
+    profiling.instrument(engine.sync_engine)
+    return engine
+
+engine = _engine(settings.SQLALCHEMY_DATABASE_URL, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base() 
\ No newline at end of file
+
+# Sessions on the replica are marked so reads skip their write-backs (stat
+# snapshots) and keep their own cache entries. Without a replica, reads use the primary.
+read_engine = None
+ReadSessionLocal = SessionLocal
+if settings.READ_DATABASE_URL:
+    read_engine = _engine(_normalized_url(settings.READ_DATABASE_URL), "replica")
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, info={"replica": True})
+
+async_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+if settings.ASYNC_DB:
+    async_engine = _async_engine(settings.SQLALCHEMY_ASYNC_DATABASE_URL, "primary_async")
+    # Objects are read after the request's greenlet has returned, so keep them loaded
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autocommit=False, autoflush=False, expire_on_commit=False
+    )
+    AsyncReadSessionLocal = AsyncSessionLocal
+    if settings.SQLALCHEMY_ASYNC_READ_DATABASE_URL:
+        AsyncReadSessionLocal = async_sessionmaker(
+            _async_engine(settings.SQLALCHEMY_ASYNC_READ_DATABASE_URL, "replica_async"),
+            autocommit=False, autoflush=False, expire_on_commit=False, info={"replica": True}
+        )
+
+Base = declarative_base()
+
+# Threads for crud calls on sync sessions that already hold a connection. A
+# burst of requests waiting for the pool can fill the shared threadpool, so
+# these get threads of their own and can always finish and hand it back, as
+# FastAPI does for the teardown of sync dependencies.
+_connected_threads = CapacityLimiter((settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW) * (2 if read_engine else 1))
+
+T = TypeVar("T")
+
+async def run(db: Union[Session, AsyncSession], fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call a ``crud`` function with either kind of session.
+
+    Sync sessions run it in the threadpool, as FastAPI does for ``def`` routes,
+    so its blocking IO never stalls the event loop. Async sessions use
+    ``run_sync``, which runs the same ORM code in a greenlet whose IO is
+    awaited on the event loop.
+    """
+    with profiling.phase("crud"):
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(fn, *args, **kwargs)
+        call = profiling.profiled(functools.partial(fn, db, *args, **kwargs))
+        if db.in_transaction():
+            return await to_thread.run_sync(call, limiter=_connected_threads)
+        return await run_in_threadpool(call)
+
+def _stream_sync(statement: Any, partition_size: int) -> Iterator[Sequence[Any]]:
+    with SessionLocal() as db:
+        result = db.execute(statement.execution_options(yield_per=partition_size))
+        yield from result.partitions()
+
+async def stream(statement: Any, partition_size: int = 1000) -> AsyncIterator[Sequence[Any]]:
+    """Yield a select's rows in partitions from a server-side cursor.
+
+    Uses its own session so it can outlive the request's dependencies, which
+    FastAPI closes before a streaming body is sent.
+    """
+    if settings.ASYNC_DB:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(statement.execution_options(yield_per=partition_size))
+            async for partition in result.partitions():
+                yield partition
+        return
+
+    partitions = _stream_sync(statement, partition_size)
+    try:
+        async for partition in iterate_in_threadpool(partitions):
+            yield partition
+    finally:
+        await run_in_threadpool(partitions.close)
@@ -0,0 +1,141 @@
+"""Fan-out of league updates to Server-Sent Events subscribers.
+
+Write paths in ``crud`` queue events on their session; once the transaction
+commits they go to the in-process ``publisher``, which encodes each event once
+and copies it to every subscriber of the league. Ranking deltas are likewise
+computed once per change, however many clients are watching. Only the worker
+process that handled a write sees its events.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .database import settings
+
+logger = logging.getLogger("versus.events")
+
+RankingsLoader = Callable[[str], Awaitable[List[Dict]]]
+
+def encode(event_type: str, data: Any) -> str:
+    """One SSE message"""
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+class Subscription:
+    def __init__(self, league_id: str, rankings: bool, queue_size: int):
+        self.league_id = league_id
+        self.rankings = rankings
+        self.loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, message: str) -> None:
+        """Queue a message; must run on the subscriber's event loop"""
+        if self._queue.full():
+            # Rather than buffer without bound, tell a slow client to refetch
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            message = encode("resync", {})
+        self._queue.put_nowait(message)
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+class LeaguePublisher:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        # Set by the app; returns a league's rankings as JSON-ready rows
+        self.rankings_loader: Optional[RankingsLoader] = None
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._rankings: Dict[str, List[Dict]] = {}
+        self._refreshing: Set[str] = set()
+        self._stale: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, league_id: str, rankings: bool = False) -> Subscription:
+        subscription = Subscription(league_id, rankings, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(league_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.league_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.league_id, None)
+            if not any(other.rankings for other in subscribers):
+                self._rankings.pop(subscription.league_id, None)
+
+    def publish(self, league_id: str, event_type: str, data: Any) -> None:
+        """Send an event to the league's subscribers; safe from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(league_id, ()))
+        if not subscribers:
+            return
+        message = encode(event_type, data)
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.put, message)
+
+        watching = next((subscription for subscription in subscribers if subscription.rankings), None)
+        if watching is not None and self.rankings_loader is not None:
+            with self._lock:
+                # A refresh already running picks this change up on its next pass
+                self._stale.add(league_id)
+                if league_id in self._refreshing:
+                    return
+                self._refreshing.add(league_id)
+            # In a fresh context, so the refresh is not counted towards the writing request
+            watching.loop.call_soon_threadsafe(self._start_refresh, league_id, context=contextvars.Context())
+
+    async def rankings_snapshot(self, league_id: str) -> List[Dict]:
+        """The league's rankings as last sent to subscribers, loading them if none were"""
+        rankings = self._rankings.get(league_id)
+        if rankings is None:
+            rankings = await self.rankings_loader(league_id)
+            with self._lock:
+                rankings = self._rankings.setdefault(league_id, rankings)
+        return rankings
+
+    def _start_refresh(self, league_id: str) -> None:
+        # The loop only keeps weak references to tasks
+        task = asyncio.ensure_future(self._refresh_rankings(league_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh_rankings(self, league_id: str) -> None:
+        try:
+            while True:
+                with self._lock:
+                    self._stale.discard(league_id)
+                self._send_ranking_delta(league_id, await self.rankings_loader(league_id))
+                with self._lock:
+                    if league_id not in self._stale:
+                        self._refreshing.discard(league_id)
+                        return
+        except Exception:
+            logger.exception("Refreshing rankings of league %s failed", league_id)
+            with self._lock:
+                self._refreshing.discard(league_id)
+
+    def _send_ranking_delta(self, league_id: str, rankings: List[Dict]) -> None:
+        previous = {row["player_name"]: (rank, row) for rank, row in enumerate(self._rankings.get(league_id, ()), start=1)}
+        changed = [
+            {**row, "rank": rank}
+            for rank, row in enumerate(rankings, start=1)
+            if previous.get(row["player_name"]) != (rank, row)
+        ]
+        removed = sorted(previous.keys() - {row["player_name"] for row in rankings})
+        with self._lock:
+            subscribers = [subscription for subscription in self._subscribers.get(league_id, ()) if subscription.rankings]
+            if subscribers:
+                self._rankings[league_id] = rankings
+        if not subscribers or not (changed or removed):
+            return
+        message = encode("rankings", {"changed": changed, "removed": removed})
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.put, message)
+
+publisher = LeaguePublisher(settings.EVENTS_QUEUE_SIZE)
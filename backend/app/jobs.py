@@ -0,0 +1,225 @@
+"""Background jobs for heavy league operations.
+
+A job is a row in ``jobs``. Requests add one in their own transaction and
+answer 202 straight away. Worker threads, started with the app or in a
+separate process, claim queued rows with a conditional UPDATE, so any number
+of workers and processes can share the queue. Handlers work in short
+transactions and record their progress on the row with each commit.
+
+The row's ``updated_at`` is the running worker's heartbeat. A job whose worker
+died is taken over once that is older than JOBS_STALE_SECONDS, so handlers
+must be safe to run again from the start.
+
+Usage:
+    python -m app.jobs   # a worker process, for when the app runs with JOBS_WORKERS=0
+"""
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from sqlalchemy import and_, event, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal, settings
+
+logger = logging.getLogger("versus.jobs")
+
+Handler = Callable[[Session, models.Job], None]
+
+_handlers: Dict[str, Handler] = {}
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    """Register the function that runs jobs of ``kind``"""
+    def decorator(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def enqueue(db: Session, kind: str, league_id: str, params: Optional[Dict[str, Any]] = None) -> models.Job:
+    """Add a job to the session; workers see it once the transaction commits"""
+    job = models.Job(
+        id=str(uuid.uuid4()),
+        kind=kind,
+        league_id=league_id,
+        params=params or {},
+        status="queued",
+        progress=0
+    )
+    db.add(job)
+    db.info["jobs_enqueued"] = True
+    return job
+
+def requeue(db: Session, job: models.Job) -> None:
+    """Queue a failed job again with the params it saved; workers see it once the transaction commits"""
+    job.status = "queued"
+    job.error = job.finished_at = None
+    db.info["jobs_enqueued"] = True
+
+def get_job(db: Session, job_id: str) -> Optional[models.Job]:
+    return db.get(models.Job, job_id)
+
+def advance(job: models.Job, rows: int) -> None:
+    """Count processed rows and beat the heartbeat; saved by the handler's next commit"""
+    job.progress += rows
+    job.updated_at = _now()
+
+@contextmanager
+def heartbeat(job: models.Job) -> Iterator[None]:
+    """Keep a running job's heartbeat going through one long transaction.
+
+    ``advance`` only reaches other workers when the handler commits, so a
+    thread of its own stamps ``updated_at`` in separate short transactions.
+    """
+    stop = threading.Event()
+    job_id = job.id
+
+    def beat() -> None:
+        while not stop.wait(settings.JOBS_STALE_SECONDS / 3):
+            try:
+                with SessionLocal() as db:
+                    db.execute(
+                        update(models.Job)
+                        .where(models.Job.id == job_id)
+                        .where(models.Job.status == "running")
+                        .values(updated_at=_now())
+                        .execution_options(synchronize_session=False)
+                    )
+                    db.commit()
+            except Exception:
+                logger.exception("Heartbeat of job %s failed", job_id)
+
+    thread = threading.Thread(target=beat, name=f"versus-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def _claimable():
+    stale = _now() - timedelta(seconds=settings.JOBS_STALE_SECONDS)
+    return or_(
+        models.Job.status == "queued",
+        and_(models.Job.status == "running", models.Job.updated_at < stale)
+    )
+
+def claim(db: Session) -> Optional[models.Job]:
+    """Take the oldest runnable job, or None when there is none"""
+    candidates = db.execute(
+        select(models.Job.id)
+        .where(_claimable())
+        .order_by(models.Job.created_at)
+        .limit(10)
+    ).scalars().all()
+    for job_id in candidates:
+        now = _now()
+        # The UPDATE checks again, so only one worker wins each job
+        claimed = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id)
+            .where(_claimable())
+            .values(status="running", progress=0, error=None, started_at=now, updated_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(models.Job, job_id)
+    return None
+
+def run_job(db: Session, job: models.Job) -> None:
+    """Run a claimed job to completion and record how it ended"""
+    try:
+        _handlers[job.kind](db, job)
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Job %s (%s) failed", job.id, job.kind)
+        job.status = "failed"
+        job.error = str(exc) or type(exc).__name__
+    else:
+        job.status = "succeeded"
+    job.finished_at = job.updated_at = _now()
+    db.commit()
+
+def run_next(db: Session) -> bool:
+    """Claim and run one job; False when the queue was empty"""
+    job = claim(db)
+    if job is None:
+        return False
+    run_job(db, job)
+    return True
+
+class Worker:
+    """Threads that run queued jobs until stopped.
+
+    They are woken when this process queues a job, and otherwise poll every
+    JOBS_POLL_SECONDS for jobs queued elsewhere or left behind by a dead worker.
+    """
+    def __init__(self, threads: int, poll_seconds: float):
+        self.threads = threads
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        self._stop.clear()
+        for index in range(self.threads):
+            thread = threading.Thread(target=self._loop, name=f"versus-jobs-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with SessionLocal() as db:
+                    ran = run_next(db)
+            except Exception:
+                logger.exception("Job worker failed")
+                ran = False
+            if not ran:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+worker = Worker(settings.JOBS_WORKERS, settings.JOBS_POLL_SECONDS)
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    if session.info.pop("jobs_enqueued", False):
+        worker.wake()
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("jobs_enqueued", None)
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    # Importing crud registers the handlers
+    from . import crud  # noqa: F401
+    process_worker = Worker(max(settings.JOBS_WORKERS, 1), settings.JOBS_POLL_SECONDS)
+    process_worker.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        process_worker.stop()
+
+if __name__ == "__main__":
+    main()
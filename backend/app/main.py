@@ -1,13 +1,21 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
-import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from datetime import datetime, timezone
+import asyncio
+import time
 
-from . import models, schemas, crud
-from .database import SessionLocal, engine, settings
+from . import schemas, crud, pool_metrics, match_io, profiling, events, jobs
+from .cache import cache, note_league_version
+from .coalescer import coalescer
+from .match_log import match_logs
+from .database import (
+    SessionLocal, AsyncSessionLocal, ReadSessionLocal, AsyncReadSessionLocal, engine, settings, run, stream
+)
 
 # Create database tables
 # models.Base.metadata.create_all(bind=engine)
@@ -25,8 +33,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing", "X-Last-Write", "Location"],
 )
 
+# Request profiling (Server-Timing header, JSON log line, sampled cProfile)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        profiling.ProfilingMiddleware,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        slow_ms=settings.PROFILE_SLOW_MS,
+        profile_dir=settings.PROFILE_DIR,
+    )
+
 # Database dependency
 def get_db():
     db = SessionLocal()
@@ -35,21 +53,136 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db(request: Request):
+    db = (SessionLocal if reads_from_primary(request) else ReadSessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    async with (AsyncSessionLocal if reads_from_primary(request) else AsyncReadSessionLocal)() as db:
+        yield db
+
+DBSession = Union[Session, AsyncSession]
+get_session = get_async_db if settings.ASYNC_DB else get_db
+# GET routes read from the replica when one is configured
+get_read_session = get_async_read_db if settings.ASYNC_DB else get_read_db
+
+# Read-your-writes: a client's reads go to the primary shortly after it writes
+LAST_WRITE_COOKIE = "versus_last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether the client wrote so recently that the replica may not have its write yet.
+
+    The time of the last write comes from the ``X-Last-Write`` header, for
+    clients that do not keep cookies, or else from the cookie set on writes.
+    """
+    last_write = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return time.time() - float(last_write) < settings.READ_YOUR_WRITES_SECONDS
+    except (TypeError, ValueError):
+        return False
+
+if settings.READ_DATABASE_URL:
+    @app.middleware("http")
+    async def mark_writes(request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            last_write = f"{time.time():.3f}"
+            response.headers[LAST_WRITE_HEADER] = last_write
+            response.set_cookie(
+                LAST_WRITE_COOKIE,
+                last_write,
+                max_age=max(int(settings.READ_YOUR_WRITES_SECONDS), 1),
+                httponly=True,
+                samesite="lax"
+            )
+        return response
+
+# Conditional GETs for league-scoped reads
+class NotModified(Exception):
+    def __init__(self, etag: str):
+        self.etag = etag
+
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return Response(status_code=304, headers={"ETag": exc.etag, "Cache-Control": "no-cache"})
+
+async def league_etag(
+    league_id: str,
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_read_session)
+):
+    """Answer 304 when the client already has the current league version.
+
+    Only the league's version is read, so unchanged polls skip the actual query.
+    The version also keys the cached results the route reads, so the body
+    always matches the ETag.
+    """
+    version = await run(db, crud.get_league_version, league_id)
+    if version is None:
+        return
+    note_league_version(db, league_id, version)
+
+    etag = f'W/"{league_id}-{version}"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+        raise NotModified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+def json_rows(rows: List[dict], response: Response) -> ORJSONResponse:
+    """Serialize rows the server built itself with orjson, skipping response_model validation.
+
+    Headers that dependencies set on ``response`` (ETag, Cache-Control, the
+    next-page cursor) only apply to returned values, so they are copied over.
+    """
+    json_response = ORJSONResponse(rows)
+    json_response.raw_headers.extend(
+        (key, value) for key, value in response.raw_headers if key != b"content-length"
+    )
+    return json_response
+
+class TimeWindow:
+    """Optional ``since``/``until`` window; ``as_of`` is an alias of ``until``"""
+    def __init__(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        as_of: Optional[datetime] = None
+    ):
+        if as_of is not None and until is not None:
+            raise HTTPException(status_code=400, detail="Use either as_of or until, not both")
+        # Dates without an offset are taken as UTC
+        self.since, self.until = (
+            value.replace(tzinfo=value.tzinfo or timezone.utc) if value is not None else None
+            for value in (since, as_of if as_of is not None else until)
+        )
+        if self.since is not None and self.until is not None and self.since > self.until:
+            raise HTTPException(status_code=400, detail="since must not be after until")
+
 # League related APIs
 @app.get("/api/leagues", response_model=List[schemas.LeagueResponse])
-async def get_leagues(db: Session = Depends(get_db)):
+async def get_leagues(db: DBSession = Depends(get_read_session)):
     """Get all leagues"""
-    return crud.get_leagues(db)
+    return await run(db, crud.get_leagues)
 
 @app.post("/api/leagues", response_model=schemas.LeagueResponse)
-async def create_league(league: schemas.LeagueCreate, db: Session = Depends(get_db)):
+async def create_league(league: schemas.LeagueCreate, db: DBSession = Depends(get_session)):
     """Create a new league"""
-    return crud.create_league(db=db, league=league)
+    return await run(db, crud.create_league, league=league)
 
-@app.get("/api/leagues/{league_id}", response_model=schemas.LeagueResponse)
-async def get_league(league_id: str, db: Session = Depends(get_db)):
+@app.get("/api/leagues/{league_id}", response_model=schemas.LeagueResponse, dependencies=[Depends(league_etag)])
+async def get_league(league_id: str, db: DBSession = Depends(get_read_session)):
     """Get league info"""
-    league = crud.get_league(db, league_id=league_id)
+    league = await run(db, crud.get_league, league_id=league_id)
     if league is None:
         raise HTTPException(status_code=404, detail="League not found")
     return league
@@ -58,186 +191,489 @@ async def get_league(league_id: str, db: Session = Depends(get_db)):
 async def update_league(
     league_id: str, 
     league_update: schemas.LeagueUpdate,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_session)
 ):
     """Update league info"""
-    league = crud.get_league(db, league_id=league_id)
+    league = await run(db, crud.get_league, league_id=league_id)
     if league is None:
         raise HTTPException(status_code=404, detail="League not found")
     
-    return crud.update_league(db=db, league_id=league_id, league_update=league_update)
-
-@app.delete("/api/leagues/{league_id}", response_model=schemas.APIResponse)
-async def delete_league(league_id: str, db: Session = Depends(get_db)):
-    """Delete a league and all its related data"""
-    success = crud.delete_league(db, league_id)
-    if not success:
-        raise HTTPException(
-            status_code=404,
-            detail="League not found or could not be deleted"
-        )
-    
-    return schemas.APIResponse(
-        success=True,
-        message="League deleted successfully"
-    )
+    return await run(db, crud.update_league, league_id=league_id, league_update=league_update)
+
+@app.delete("/api/leagues/{league_id}", response_model=schemas.JobResponse, status_code=202)
+async def delete_league(league_id: str, response: Response, db: DBSession = Depends(get_session)):
+    """Delete a league and all its related data.
+
+    The league disappears at once; a background job deletes its data. Poll
+    ``GET /api/jobs/{job_id}`` for progress.
+    """
+    job = await run(db, crud.delete_league, league_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="League not found")
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return job
+
+@app.post("/api/leagues/{league_id}/rebuild-stats", response_model=schemas.JobResponse, status_code=202)
+async def rebuild_league_stats(league_id: str, response: Response, db: DBSession = Depends(get_session)):
+    """Rebuild the league's aggregates and ratings from its matches in a background job"""
+    job = await run(db, crud.rebuild_league_stats, league_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="League not found")
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return job
 
 # Match related APIs
 @app.post("/api/leagues/{league_id}/matches", response_model=schemas.MatchResponse)
 async def create_match(
     league_id: str,
     match: schemas.MatchCreate,
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: DBSession = Depends(get_session)
 ):
-    """Create a new match result"""
-    league = crud.get_league(db, league_id=league_id)
+    """Create a new match result.
+
+    Retrying with the same ``Idempotency-Key`` header returns the match
+    recorded the first time instead of recording it again.
+    """
+    league = await run(db, crud.get_league, league_id=league_id)
     if league is None:
         raise HTTPException(status_code=404, detail="League not found")
     
-    return crud.create_match(db=db, league_id=league_id, match=match)
+    try:
+        if settings.MATCH_COALESCE_ENABLED:
+            # Give the connection back while waiting, the batch commits on one of its own
+            await run(db, Session.close)
+            return await coalescer.submit(league_id, match, idempotency_key)
+        return await run(db, crud.create_match, league_id=league_id, match=match, idempotency_key=idempotency_key)
+    except crud.PlayerDeletedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/api/leagues/{league_id}/matches/bulk", response_model=schemas.BulkImportResponse)
+async def import_matches(
+    league_id: str,
+    request: Request,
+    db: DBSession = Depends(get_session)
+):
+    """Import many matches in one transaction.
+
+    Send a JSON array, NDJSON (application/x-ndjson) or CSV (text/csv) body, or a
+    multipart upload with the file in a ``file`` field. Invalid rows are skipped
+    and reported; the valid ones are inserted together.
+    """
+    league = await run(db, crud.get_league, league_id=league_id)
+    if league is None:
+        raise HTTPException(status_code=404, detail="League not found")
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing file upload")
+        body = await upload.read()
+        content_type = upload.content_type or ""
+        if upload.filename and upload.filename.endswith(".csv"):
+            content_type = "text/csv"
+        elif upload.filename and upload.filename.endswith((".ndjson", ".jsonl")):
+            content_type = "application/x-ndjson"
+    else:
+        body = await request.body()
+
+    try:
+        matches, errors = match_io.parse_matches(body, content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    start = time.perf_counter()
+    try:
+        inserted = await run(db, crud.create_matches_bulk, league_id=league_id, matches=matches)
+    except crud.PlayerDeletedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    elapsed = time.perf_counter() - start
+
+    return schemas.BulkImportResponse(
+        inserted=inserted,
+        failed=len(errors),
+        errors=errors,
+        elapsed_ms=round(elapsed * 1000, 3),
+        rows_per_second=round(inserted / elapsed, 1) if elapsed > 0 else 0.0
+    )
+
+@app.get("/api/leagues/{league_id}/matches/export")
+async def export_matches(
+    league_id: str,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    db: DBSession = Depends(get_read_session)
+):
+    """Stream a league's full match history, oldest first, as NDJSON or CSV"""
+    league = await run(db, crud.get_league, league_id=league_id)
+    if league is None:
+        raise HTTPException(status_code=404, detail="League not found")
+
+    partitions = stream(crud.match_export_statement(league_id))
+    if export_format == "csv":
+        body, media_type = match_io.export_csv(partitions), "text/csv"
+    else:
+        body, media_type = match_io.export_ndjson(partitions), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="matches-{league_id}.{export_format}"'}
+    )
 
-@app.get("/api/leagues/{league_id}/matches", response_model=List[schemas.MatchResponse])
+@app.get("/api/leagues/{league_id}/matches", response_model=List[schemas.MatchResponse], dependencies=[Depends(league_etag)])
 async def get_matches(
     league_id: str, 
+    response: Response,
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_read_session)
 ):
-    """Get match list"""
-    return crud.get_matches(db, league_id=league_id, limit=limit, offset=offset)
+    """Get match list; follow the X-Next-Cursor header to fetch the next page"""
+    try:
+        matches = await run(db, crud.get_matches, league_id=league_id, limit=limit, offset=offset, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if matches and len(matches) == limit:
+        response.headers["X-Next-Cursor"] = crud.encode_match_cursor(matches[-1])
+    return json_rows([match._asdict() for match in matches], response)
 
 @app.put("/api/matches/{match_id}", response_model=schemas.MatchResponse)
 async def update_match(
     match_id: str,
     match_update: schemas.MatchUpdate,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_session)
 ):
     """Update match result"""
-    match = crud.get_match(db, match_id=match_id)
+    match = await run(db, crud.get_match, match_id=match_id)
     if match is None:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    return crud.update_match(db=db, match_id=match_id, match_update=match_update)
+    try:
+        return await run(db, crud.update_match, match_id=match_id, match_update=match_update)
+    except crud.PlayerDeletedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 @app.delete("/api/matches/{match_id}", response_model=schemas.APIResponse)
 async def delete_match(
     match_id: str,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_session)
 ):
     """Delete match"""
-    match = crud.get_match(db, match_id=match_id)
+    match = await run(db, crud.get_match, match_id=match_id)
     if match is None:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    success = crud.delete_match(db=db, match_id=match_id)
+    success = await run(db, crud.delete_match, match_id=match_id)
     return schemas.APIResponse(
         success=success,
         message="Match deleted successfully" if success else "Failed to delete match"
     )
 
 # Player Stats and Rankings APIs
-@app.get("/api/leagues/{league_id}/player-stats", response_model=List[schemas.PlayerStats])
-async def get_player_stats(league_id: str, db: Session = Depends(get_db)):
+@app.get("/api/leagues/{league_id}/player-stats", response_model=List[schemas.PlayerStats], dependencies=[Depends(league_etag)])
+async def get_player_stats(league_id: str, response: Response, db: DBSession = Depends(get_read_session)):
     """Get all players' statistics"""
-    league = crud.get_league(db, league_id=league_id)
+    league = await run(db, crud.get_league, league_id=league_id)
     if league is None:
         raise HTTPException(status_code=404, detail="League not found")
     
-    return crud.get_rankings(db, league_id=league_id)  # 重用現有的 crud 函數
+    return json_rows(await run(db, crud.get_rankings, league_id=league_id), response)  # 重用現有的 crud 函數
+
+@app.get("/api/leagues/{league_id}/rankings", response_model=List[schemas.PlayerStats], dependencies=[Depends(league_etag)])
+async def get_rankings(
+    league_id: str,
+    response: Response,
+    sort: str = Query("win_rate", pattern="^(win_rate|rating)$"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    window: TimeWindow = Depends(),
+    db: DBSession = Depends(get_read_session)
+):
+    """Get rankings ordered by win rate, or by Elo rating with ``sort=rating``.
 
-@app.get("/api/leagues/{league_id}/rankings", response_model=List[schemas.PlayerStats])
-async def get_rankings(league_id: str, db: Session = Depends(get_db)):
-    """Get rankings ordered by win rate"""
-    league = crud.get_league(db, league_id=league_id)
+    ``since``/``until`` restrict them to matches in a time window; ``as_of``
+    gives the rankings as they stood at a past date. ``limit``/``offset``
+    return one page of them.
+    """
+    league = await run(db, crud.get_league, league_id=league_id)
     if league is None:
         raise HTTPException(status_code=404, detail="League not found")
     
-    return crud.get_rankings(db, league_id=league_id)
+    rankings = await run(
+        db, crud.get_rankings,
+        league_id=league_id, sort=sort, since=window.since, until=window.until, limit=limit, offset=offset
+    )
+    return json_rows(rankings, response)
 
-@app.get("/api/leagues/{league_id}/players/{player_name}", response_model=schemas.PlayerStats)
+@app.get("/api/leagues/{league_id}/players/{player_name}/rank", response_model=schemas.PlayerRank, dependencies=[Depends(league_etag)])
+async def get_player_rank(
+    league_id: str,
+    player_name: str,
+    sort: str = Query("win_rate", pattern="^(win_rate|rating)$"),
+    neighbors: int = Query(2, ge=0, le=50),
+    window: TimeWindow = Depends(),
+    db: DBSession = Depends(get_read_session)
+):
+    """Get a player's rank and the players just above and below them"""
+    rank = await run(
+        db, crud.get_player_rank,
+        league_id=league_id, player_name=player_name, sort=sort, neighbors=neighbors,
+        since=window.since, until=window.until
+    )
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return rank
+
+@app.get("/api/leagues/{league_id}/players/{player_name}", response_model=schemas.PlayerStats, dependencies=[Depends(league_etag)])
 async def get_player_stats(
     league_id: str, 
     player_name: str, 
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_read_session)
 ):
     """Get player stats"""
-    stats = crud.get_player_stats(db, league_id=league_id, player_name=player_name)
+    stats = await run(db, crud.get_player_stats, league_id=league_id, player_name=player_name)
     if stats is None:
         raise HTTPException(status_code=404, detail="Player not found")
     return stats
 
-@app.get("/api/leagues/{league_id}/head-to-head/{player1}/{player2}")
+@app.get("/api/leagues/{league_id}/players/{player_name}/profile", response_model=schemas.PlayerProfile, dependencies=[Depends(league_etag)])
+async def get_player_profile(
+    league_id: str,
+    player_name: str,
+    window: int = Query(10, ge=1, le=1000),
+    points: int = Query(100, ge=3, le=1000),
+    db: DBSession = Depends(get_read_session)
+):
+    """Get a player's stats, record against each opponent and rolling form.
+
+    The form series use the last ``window`` results at each point and are
+    downsampled to at most ``points`` points.
+    """
+    profile = await run(
+        db, crud.get_player_profile,
+        league_id=league_id, player_name=player_name, window=window, points=points
+    )
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return profile
+
+@app.get("/api/leagues/{league_id}/head-to-head/{player1}/{player2}", dependencies=[Depends(league_etag)])
 async def get_head_to_head(
     league_id: str,
     player1: str,
     player2: str,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_read_session)
 ):
     """Get head-to-head records"""
-    return crud.get_head_to_head(db, league_id=league_id, player1=player1, player2=player2)
+    return await run(db, crud.get_head_to_head, league_id=league_id, player1=player1, player2=player2)
+
+@app.get("/api/leagues/{league_id}/head-to-head-matrix", dependencies=[Depends(league_etag)])
+async def get_head_to_head_matrix(
+    league_id: str,
+    players: Optional[str] = None,
+    db: DBSession = Depends(get_read_session)
+):
+    """Get every pairwise head-to-head record; ``players`` is a comma-separated subset"""
+    league = await run(db, crud.get_league, league_id=league_id)
+    if league is None:
+        raise HTTPException(status_code=404, detail="League not found")
+
+    subset = None
+    if players is not None:
+        subset = tuple(sorted({name.strip() for name in players.split(",") if name.strip()}))
+    return await run(db, crud.get_head_to_head_matrix, league_id=league_id, players=subset)
 
 # Statistics related APIs
-@app.get("/api/leagues/{league_id}/recent")
+@app.get(
+    "/api/leagues/{league_id}/dashboard",
+    response_model=schemas.Dashboard,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(league_etag)]
+)
+async def get_dashboard(
+    league_id: str,
+    include: str = ",".join(crud.DASHBOARD_VIEWS),
+    recent_limit: int = Query(10, ge=1, le=100),
+    sort: str = Query("win_rate", pattern="^(win_rate|rating)$"),
+    window: TimeWindow = Depends(),
+    db: DBSession = Depends(get_read_session)
+):
+    """Get the league with its stats, rankings, player stats and recent matches.
+
+    ``include`` is a comma-separated subset of those views; all of them come
+    from one read of the league's aggregates.
+    """
+    views = {view.strip() for view in include.split(",") if view.strip()}
+    unknown = views - set(crud.DASHBOARD_VIEWS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown views: {', '.join(sorted(unknown))}")
+
+    league = await run(db, crud.get_league, league_id=league_id)
+    if league is None:
+        raise HTTPException(status_code=404, detail="League not found")
+
+    dashboard = await run(
+        db,
+        crud.get_dashboard,
+        league_id=league_id,
+        include=tuple(view for view in crud.DASHBOARD_VIEWS if view in views),
+        recent_limit=recent_limit,
+        sort=sort,
+        since=window.since,
+        until=window.until
+    )
+    return schemas.Dashboard(league=league, **dashboard)
+
+@app.get("/api/leagues/{league_id}/recent", response_model=List[schemas.MatchResponse], dependencies=[Depends(league_etag)])
 async def get_recent_matches(
     league_id: str,
+    response: Response,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_read_session)
 ):
     """Get recent matches"""
-    return crud.get_recent_matches(db, league_id=league_id, limit=limit)
+    matches = await run(db, crud.get_recent_matches, league_id=league_id, limit=limit)
+    return json_rows([match._asdict() for match in matches], response)
 
-@app.get("/api/leagues/{league_id}/stats")
-async def get_league_stats(league_id: str, db: Session = Depends(get_db)):
-    """Get league stats"""
-    return crud.get_league_stats(db, league_id=league_id)
+@app.get("/api/leagues/{league_id}/stats", dependencies=[Depends(league_etag)])
+async def get_league_stats(
+    league_id: str,
+    window: TimeWindow = Depends(),
+    db: DBSession = Depends(get_read_session)
+):
+    """Get league stats, optionally over a ``since``/``until`` window or ``as_of`` a date"""
+    return await run(db, crud.get_league_stats, league_id=league_id, since=window.since, until=window.until)
 
 @app.post("/api/leagues/{league_id}/players", response_model=schemas.Player)
-def create_player(league_id: str, player: schemas.PlayerCreate, db: Session = Depends(get_db)):
+async def create_player(league_id: str, player: schemas.PlayerCreate, db: DBSession = Depends(get_session)):
     """Create a new player in the league"""
     print("Received request to create player:")
     print(f"League ID: {league_id}")
     print(f"Player data: {player.dict()}")
     
     # Check if league exists
-    db_league = crud.get_league(db, league_id)
+    db_league = await run(db, crud.get_league, league_id)
     if not db_league:
         raise HTTPException(status_code=404, detail="League not found")
     
     # Check if player with same name already exists in the league
-    matches = db.query(models.Match)\
-        .filter(models.Match.league_id == league_id)\
-        .filter((models.Match.player1 == player.name) | (models.Match.player2 == player.name))\
-        .first()
-    
-    if matches:
+    if await run(db, crud.get_player_by_name, league_id, player.name):
         raise HTTPException(status_code=400, detail="Player already exists in this league")
     
-    return crud.create_player(db, league_id, player.name)
+    return await run(db, crud.create_player, league_id, player.name)
 
-@app.delete("/api/leagues/{league_id}/players/{player_name}", response_model=schemas.APIResponse)
-def delete_player(
+@app.delete("/api/leagues/{league_id}/players/{player_name}", response_model=schemas.JobResponse, status_code=202)
+async def delete_player(
     league_id: str,
     player_name: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: DBSession = Depends(get_session)
 ):
-    """Delete a player from the league"""
+    """Delete a player and their matches from the league in a background job"""
     # Check if league exists
-    db_league = crud.get_league(db, league_id)
+    db_league = await run(db, crud.get_league, league_id)
     if not db_league:
         raise HTTPException(status_code=404, detail="League not found")
     
-    success = crud.delete_player(db, league_id, player_name)
-    if not success:
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot delete player because they have match records. Delete all matches first."
-        )
-    
-    return schemas.APIResponse(
-        success=True,
-        message="Player deleted successfully"
+    job = await run(db, crud.delete_player, league_id, player_name)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Player not found")
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return job
+
+# Background jobs
+@app.on_event("startup")
+def start_job_workers() -> None:
+    jobs.worker.start()
+
+@app.on_event("shutdown")
+def stop_job_workers() -> None:
+    jobs.worker.stop()
+
+@app.get("/api/jobs/{job_id}", response_model=schemas.JobResponse)
+async def get_job(job_id: str, db: DBSession = Depends(get_session)):
+    """Get a background job's status and progress"""
+    job = await run(db, jobs.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# League event stream
+async def _load_rankings(league_id: str) -> List[dict]:
+    """Rankings for the event publisher, read with a session of its own"""
+    if settings.ASYNC_DB:
+        async with AsyncSessionLocal() as db:
+            return await run(db, crud.get_rankings, league_id=league_id)
+    with SessionLocal() as db:
+        return await run(db, crud.get_rankings, league_id=league_id)
+
+events.publisher.rankings_loader = _load_rankings
+
+@app.get("/api/leagues/{league_id}/events")
+async def get_league_events(
+    league_id: str,
+    rankings: bool = False,
+    db: DBSession = Depends(get_read_session)
+):
+    """Server-Sent Events for a league's match and player changes.
+
+    With ``rankings=true`` the stream starts with the full rankings and then
+    sends a ``rankings`` event with the rows that moved after each change.
+    A ``resync`` event means events were dropped and the client should refetch.
+    """
+    league = await run(db, crud.get_league, league_id=league_id)
+    if league is None:
+        raise HTTPException(status_code=404, detail="League not found")
+
+    async def event_stream():
+        subscription = events.publisher.subscribe(league_id, rankings=rankings)
+        try:
+            yield events.encode("ready", {"league_id": league_id})
+            if rankings:
+                snapshot = await events.publisher.rankings_snapshot(league_id)
+                yield events.encode("rankings", {
+                    "changed": [{**row, "rank": rank} for rank, row in enumerate(snapshot, start=1)],
+                    "removed": []
+                })
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.get(), settings.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line that keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+        finally:
+            events.publisher.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+# Internal diagnostics
+@app.get("/api/_internal/pool")
+async def get_pool_metrics():
+    """Connection pool usage and checkout wait times for this worker"""
+    return pool_metrics.snapshot()
+
+@app.get("/api/_internal/cache")
+async def get_cache_metrics():
+    """League cache size and hit/miss counters for this worker"""
+    return cache.stats()
+
+@app.get("/api/_internal/match-log")
+async def get_match_log_metrics():
+    """Leagues and matches held in this worker's match log"""
+    return match_logs.stats()
+
+@app.get("/api/_internal/coalescer")
+async def get_coalescer_metrics():
+    """Batches and matches recorded by this worker's match coalescer"""
+    return coalescer.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""Reading and writing match rows as JSON, NDJSON and CSV"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Sequence, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from . import schemas
+
+JSON_TYPES = ("application/json",)
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_TYPES = ("text/csv", "application/csv")
+
+# Export column order; also a valid header for CSV imports
+EXPORT_COLUMNS = (
+    "id",
+    "player1",
+    "player2",
+    "player1_score",
+    "player2_score",
+    "winner",
+    "created_at",
+    "updated_at",
+)
+
+# Field order of schemas.MatchResponse, for rows served without re-validation
+RESPONSE_COLUMNS = tuple(schemas.MatchResponse.model_fields)
+
+_match_import = TypeAdapter(schemas.MatchImport)
+
+def _media_type(content_type: str) -> str:
+    return content_type.split(";", 1)[0].strip().lower()
+
+def _parse_raw(body: bytes, media_type: str) -> List[Tuple[int, Any]]:
+    """Split a payload into (row number, raw row) pairs; rows are 1-based"""
+    text = body.decode("utf-8-sig")
+
+    if media_type in JSON_TYPES:
+        data = json.loads(text)
+        if not isinstance(data, list):
+            raise ValueError("Expected a JSON array of matches")
+        return list(enumerate(data, start=1))
+
+    if media_type in NDJSON_TYPES:
+        rows = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append((number, json.loads(line)))
+            except json.JSONDecodeError as e:
+                rows.append((number, e))
+        return rows
+
+    if media_type in CSV_TYPES:
+        reader = csv.DictReader(io.StringIO(text))
+        # Row 1 is the header; empty cells mean "not given"
+        return [
+            (number, {key: value for key, value in row.items() if key and value not in (None, "")})
+            for number, row in enumerate(reader, start=2)
+        ]
+
+    raise ValueError(f"Unsupported content type: {media_type or 'none'}")
+
+def parse_matches(
+    body: bytes,
+    content_type: str
+) -> Tuple[List[schemas.MatchImport], List[schemas.BulkImportError]]:
+    """Validate every row of a payload, collecting the rows that fail.
+
+    Raises ValueError when the payload as a whole cannot be read.
+    """
+    matches = []
+    errors = []
+    for number, raw in _parse_raw(body, _media_type(content_type)):
+        if isinstance(raw, Exception):
+            errors.append(schemas.BulkImportError(row=number, error=f"Invalid JSON: {raw}"))
+            continue
+        try:
+            matches.append(_match_import.validate_python(raw))
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+                for error in e.errors()
+            )
+            errors.append(schemas.BulkImportError(row=number, error=message))
+    return matches, errors
+
+def _export_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+async def export_ndjson(partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """One JSON object per match, one chunk per partition"""
+    async for rows in partitions:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, map(_export_value, row)))) + "\n"
+            for row in rows
+        ).encode()
+
+async def export_csv(partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """A header row followed by one line per match, one chunk per partition"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_export_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
@@ -0,0 +1,281 @@
+"""Per-worker in-memory log of hot leagues' matches.
+
+Each league's matches are kept oldest first as parallel NumPy columns (player
+keys, scores, winner side, timestamps in microseconds and 16-byte ids), so
+reads skip both the query and ORM hydration. A log is tagged with the league
+version it reflects. Every read compares that against the database with one
+primary-key lookup, and a mismatch means another worker wrote, so the league
+is reloaded. Matches created through this worker's ``crud`` are appended in
+place instead. Leagues are evicted least recently used once the logs together
+hold more than ``MATCH_LOG_MAX_MATCHES`` matches.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import settings
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_COLUMNS = {
+    "player1": np.int64,
+    "player2": np.int64,
+    "score1": np.int64,
+    "score2": np.int64,
+    "winner_side": np.int8,
+    "created_at": np.int64,
+}
+
+_MATCH_ARRAYS = tuple(_COLUMNS) + ("ids",)
+
+def _micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+def _id_bytes(match_id: str) -> Optional[bytes]:
+    """The id's 16 bytes, or None when it is not a canonical UUID string"""
+    try:
+        value = uuid.UUID(match_id)
+    except (TypeError, ValueError):
+        return None
+    return value.bytes if str(value) == match_id else None
+
+class Columns:
+    """An immutable view of a log's first ``size`` matches"""
+    __slots__ = ("size", "player1", "player2", "score1", "score2", "winner_side", "created_at", "ids",
+                 "player_keys", "player_names", "player_created_at", "naive")
+
+    def created_at_value(self, index: int) -> datetime:
+        value = _EPOCH + timedelta(microseconds=int(self.created_at[index]))
+        return value.replace(tzinfo=None) if self.naive else value
+
+    def match_id(self, index: int) -> str:
+        return str(uuid.UUID(bytes=self.ids[index].tobytes()))
+
+    def window(self, since: Optional[datetime], until: Optional[datetime]) -> "Columns":
+        """The matches played between ``since`` and ``until``, inclusive"""
+        start = np.searchsorted(self.created_at, _micros(since), "left") if since is not None else 0
+        end = np.searchsorted(self.created_at, _micros(until), "right") if until is not None else self.size
+        view = Columns()
+        for name in self.__slots__:
+            setattr(view, name, getattr(self, name))
+        for name in _MATCH_ARRAYS:
+            setattr(view, name, getattr(self, name)[start:end])
+        view.size = max(end - start, 0)
+        return view
+
+    def registered_by(self, until: Optional[datetime]) -> np.ndarray:
+        """Which players had registered by ``until``"""
+        if until is None:
+            return np.ones(len(self.player_keys), dtype=bool)
+        return self.player_created_at <= _micros(until)
+
+class MatchLog:
+    __slots__ = ("version", "size", "columns", "ids", "player_keys", "player_names",
+                 "player_created_at", "naive", "last_position")
+
+    def __init__(self, version: int, capacity: int):
+        self.version = version
+        self.size = 0
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in _COLUMNS.items()}
+        self.ids = np.empty((capacity, 16), dtype=np.uint8)
+        self.player_keys = np.empty(0, dtype=np.int64)
+        self.player_names: List[str] = []
+        self.player_created_at = np.empty(0, dtype=np.int64)
+        self.naive = False
+        self.last_position: Tuple[int, bytes] = (-1, b"")
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        # Grow into new arrays; views handed to readers keep the old ones alive
+        capacity = max(needed, capacity * 2, 1024)
+        for name, column in self.columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+        ids = np.empty((capacity, 16), dtype=np.uint8)
+        ids[:self.size] = self.ids[:self.size]
+        self.ids = ids
+
+    def append(self, rows: List[Tuple]) -> bool:
+        """Append rows of (player1_id, player2_id, score1, score2, winner_side, created_at, id), oldest first.
+
+        Returns False and leaves the log as it was when a row does not sort
+        after the log's end, has an id that is not a UUID or names an unknown player.
+        """
+        prepared = []
+        position = self.last_position
+        for player1, player2, score1, score2, winner_side, created_at, match_id in rows:
+            id_bytes = _id_bytes(match_id)
+            if id_bytes is None:
+                return False
+            next_position = (_micros(created_at), id_bytes)
+            if next_position <= position:
+                return False
+            position = next_position
+            prepared.append((player1, player2, score1, score2, winner_side, position[0], id_bytes))
+
+        keys = np.array([key for row in prepared for key in row[:2]], dtype=np.int64)
+        codes = np.searchsorted(self.player_keys, keys)
+        if len(keys) and (codes.max() >= len(self.player_keys) or (self.player_keys[codes] != keys).any()):
+            return False
+
+        self._reserve(len(prepared))
+        for offset, row in enumerate(prepared):
+            index = self.size + offset
+            for name, value in zip(_COLUMNS, row[:6]):
+                self.columns[name][index] = value
+            self.ids[index] = np.frombuffer(row[6], dtype=np.uint8)
+        self.size += len(prepared)
+        self.last_position = position
+        return True
+
+    def view(self) -> Columns:
+        view = Columns()
+        view.size = self.size
+        for name in _COLUMNS:
+            setattr(view, name, self.columns[name][:self.size])
+        view.ids = self.ids[:self.size]
+        view.player_keys = self.player_keys
+        view.player_names = self.player_names
+        view.player_created_at = self.player_created_at
+        view.naive = self.naive
+        return view
+
+def _load(db: Session, league_id: str, version: int, max_matches: int) -> Optional[MatchLog]:
+    count = db.query(func.count(models.Match.id)).filter(models.Match.league_id == league_id).scalar()
+    if count > max_matches:
+        return None
+    players = db.execute(
+        select(models.Player.pk, models.Player.name, models.Player.created_at)
+        .where(models.Player.league_id == league_id)
+        .order_by(models.Player.pk)
+    ).all()
+    rows = db.execute(
+        select(
+            models.Match.player1_id,
+            models.Match.player2_id,
+            models.Match.player1_score,
+            models.Match.player2_score,
+            models.Match.winner_side,
+            models.Match.created_at,
+            models.Match.id
+        )
+        .where(models.Match.league_id == league_id)
+        .order_by(models.Match.created_at.asc(), models.Match.id.asc())
+    ).all()
+
+    log = MatchLog(version, len(rows))
+    log.player_keys = np.array([player.pk for player in players], dtype=np.int64)
+    log.player_names = [player.name for player in players]
+    log.player_created_at = np.array(
+        [_micros(player.created_at) if player.created_at else 0 for player in players],
+        dtype=np.int64
+    )
+    log.naive = bool(rows) and rows[0].created_at.tzinfo is None
+    if not log.append(rows):
+        # Ids that are not UUIDs, or (created_at, id) order that differs from
+        # the database's; such leagues are read from the database instead
+        return None
+    return log
+
+class MatchLogs:
+    def __init__(self, max_matches: int):
+        self.max_matches = max_matches
+        self._logs: "OrderedDict[str, MatchLog]" = OrderedDict()
+        self._matches = 0
+        # League versions found too large or unfit to keep, so they are not reloaded
+        self._skipped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, db: Session, league_id: str) -> Optional[Columns]:
+        """The league's matches, reloading them when another worker wrote since.
+
+        None when the league does not exist or cannot be kept, in which case
+        callers read from the database.
+        """
+        version = db.query(models.League.version).filter(models.League.id == league_id).scalar()
+        if version is None:
+            return None
+        with self._lock:
+            log = self._logs.get(league_id)
+            if log is not None and log.version == version:
+                self._logs.move_to_end(league_id)
+                self.hits += 1
+                return log.view()
+            if self._skipped.get(league_id) == version:
+                return None
+
+        log = _load(db, league_id, version, self.max_matches)
+        with self._lock:
+            self.loads += 1
+            self._remove(league_id)
+            if log is None:
+                self._skipped[league_id] = version
+                return None
+            self._logs[league_id] = log
+            self._matches += log.size
+            while self._matches > self.max_matches:
+                self._remove(next(iter(self._logs)))
+            return log.view()
+
+    def append(self, league_id: str, version: int, rows: Iterable[Tuple]) -> None:
+        """Apply matches a local transaction committed as ``version``.
+
+        Only a log at the version just before is extended; otherwise some other
+        write came in between and the league is dropped until its next read.
+        """
+        with self._lock:
+            log = self._logs.get(league_id)
+            if log is None:
+                return
+            size = log.size
+            if log.version == version - 1 and log.append(list(rows)):
+                log.version = version
+                self._matches += log.size - size
+                while self._matches > self.max_matches and len(self._logs) > 1:
+                    self._remove(next(iter(self._logs)))
+            else:
+                self._remove(league_id)
+
+    def discard(self, league_id: str) -> None:
+        with self._lock:
+            self._remove(league_id)
+            self._skipped.pop(league_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._logs.clear()
+            self._skipped.clear()
+            self._matches = 0
+
+    def _remove(self, league_id: str) -> None:
+        log = self._logs.pop(league_id, None)
+        if log is not None:
+            self._matches -= log.size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": settings.MATCH_LOG_ENABLED,
+                "leagues": len(self._logs),
+                "matches": self._matches,
+                "max_matches": self.max_matches,
+                "hits": self.hits,
+                "loads": self.loads,
+            }
+
+match_logs = MatchLogs(settings.MATCH_LOG_MAX_MATCHES)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, SmallInteger, Float, DateTime, ForeignKey, Index, JSON, UniqueConstraint
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -8,6 +8,10 @@ class League(Base):
     id = Column(String, primary_key=True, index=True)
     name = Column(String, index=True)
     description = Column(String, nullable=True)
+    # Bumped by every write touching the league; drives ETags
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set when a deletion job is queued; the league is hidden until the job removes it
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -16,19 +20,147 @@ class Match(Base):
 
     id = Column(String, primary_key=True, index=True)
     league_id = Column(String, ForeignKey("leagues.id"))
+    player1_id = Column(Integer, ForeignKey("players.pk"), nullable=False)
+    player2_id = Column(Integer, ForeignKey("players.pk"), nullable=False)
+    # Names copied from the players, so API responses and exports need no join
     player1 = Column(String)
     player2 = Column(String)
     player1_score = Column(Integer)
     player2_score = Column(Integer)
     winner = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 1 when player1 won, 2 when player2 did
+    winner_side = Column(SmallInteger, nullable=False)
+    # Client-chosen key that makes retried submissions safe; unique per league
+    idempotency_key = Column(String, nullable=True)
+    # Also stamped by the INSERT itself, so SQLite files created before now()
+    # rendered with microseconds store the same format as bound values
+    created_at = Column(DateTime(timezone=True), default=func.now(), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Serves league-scoped scans and (created_at, id) keyset pagination
+        Index("ix_matches_league_id_created_at_id", league_id, created_at.desc(), id),
+        # Serve per-player lookups
+        Index("ix_matches_league_id_player1_id", league_id, player1_id),
+        Index("ix_matches_league_id_player2_id", league_id, player2_id),
+        Index("ix_matches_league_id_idempotency_key", league_id, idempotency_key, unique=True),
+    )
+    # Fetch created_at on flush so writers know the new match's position
+    __mapper_args__ = {"eager_defaults": True}
+
 class Player(Base):
     __tablename__ = "players"
 
-    id = Column(String, primary_key=True, index=True)
+    # Compact key that matches reference; ``id`` stays the public identifier
+    pk = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, index=True)
     league_id = Column(String, ForeignKey("leagues.id"))
+    # Set when a deletion job is queued; the player is hidden until the job removes them
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
+
+    __table_args__ = (
+        UniqueConstraint(league_id, name, name="uq_players_league_id_name"),
+    )
+
+class PlayerStat(Base):
+    """Per-(league, player) aggregate kept in step with the matches table"""
+    __tablename__ = "player_stats"
+
+    league_id = Column(String, ForeignKey("leagues.id"), primary_key=True)
+    player_name = Column(String, primary_key=True)
+    matches_played = Column(Integer, nullable=False, default=0)
+    matches_won = Column(Integer, nullable=False, default=0)
+    matches_lost = Column(Integer, nullable=False, default=0)
+    total_score = Column(Integer, nullable=False, default=0)
+    highest_score = Column(Integer, nullable=False, default=0)
+    current_streak = Column(Integer, nullable=False, default=0)
+    win_streak = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class StatState(Base):
+    """Position of the last match applied to a league's player_stats"""
+    __tablename__ = "stat_states"
+
+    league_id = Column(String, ForeignKey("leagues.id"), primary_key=True)
+    last_created_at = Column(DateTime(timezone=True), nullable=True)
+    last_match_id = Column(String, nullable=True)
+
+class PlayerRating(Base):
+    """Current Elo rating of a player in a league"""
+    __tablename__ = "player_ratings"
+
+    league_id = Column(String, ForeignKey("leagues.id"), primary_key=True)
+    player_name = Column(String, primary_key=True)
+    rating = Column(Float, nullable=False)
+    matches_rated = Column(Integer, nullable=False, default=0)
+
+class RatingState(Base):
+    """Position of the last match the rating engine applied in a league"""
+    __tablename__ = "rating_states"
+
+    league_id = Column(String, ForeignKey("leagues.id"), primary_key=True)
+    matches_applied = Column(Integer, nullable=False, default=0)
+    last_created_at = Column(DateTime(timezone=True), nullable=True)
+    last_match_id = Column(String, nullable=True)
+
+class RatingCheckpoint(Base):
+    """All ratings of a league right after a given match, for partial replays"""
+    __tablename__ = "rating_checkpoints"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    league_id = Column(String, ForeignKey("leagues.id"), nullable=False)
+    match_created_at = Column(DateTime(timezone=True), nullable=False)
+    match_id = Column(String, nullable=False)
+    matches_applied = Column(Integer, nullable=False)
+    # {player_name: [rating, matches_rated]}
+    ratings = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_rating_checkpoints_league_position", league_id, match_created_at, match_id),
+    )
+
+class StatSnapshot(Base):
+    """Every player's aggregates in a league right after a given match"""
+    __tablename__ = "stat_snapshots"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    league_id = Column(String, ForeignKey("leagues.id"), nullable=False)
+    match_created_at = Column(DateTime(timezone=True), nullable=False)
+    match_id = Column(String, nullable=False)
+    matches_applied = Column(Integer, nullable=False)
+    # {player_name: [matches_played, matches_won, ..., win_streak]} in PlayerStat column order
+    stats = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_stat_snapshots_league_position", league_id, match_created_at, match_id),
+    )
+
+class Job(Base):
+    """A heavy league operation run by a background worker"""
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    # Not a foreign key: deletion jobs outlive their league
+    league_id = Column(String, nullable=False, index=True)
+    params = Column(JSON, nullable=False, default=dict)
+    # queued, running, succeeded or failed
+    status = Column(String, nullable=False, default="queued")
+    # Rows processed so far, out of ``total`` when known
+    progress = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Heartbeat of the running worker; a stale one lets another worker take over
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_jobs_status_created_at", status, created_at),
+    )
@@ -0,0 +1,163 @@
+"""Statistics computed over columnar NumPy arrays.
+
+The league's matches are loaded once as integer columns (player keys, scores,
+winner side) in history order, and every aggregate is taken with vectorized
+operations instead of a Python loop per match. Results match the ``orm``
+engine's; only the final per-player rows are built as Python objects.
+"""
+from collections import namedtuple
+from datetime import datetime
+from itertools import chain
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import select, true
+from sqlalchemy.orm import Session
+
+from . import models
+
+STAT_FIELDS = (
+    "matches_played",
+    "matches_won",
+    "matches_lost",
+    "total_score",
+    "highest_score",
+    "current_streak",
+    "win_streak",
+)
+
+StatRow = namedtuple("StatRow", ("player_name",) + STAT_FIELDS)
+
+_MATCH_COLUMNS = (
+    models.Match.player1_id,
+    models.Match.player2_id,
+    models.Match.player1_score,
+    models.Match.player2_score,
+    models.Match.winner_side,
+)
+
+def _load_matches(
+    db: Session,
+    league_id: str,
+    since: Optional[datetime],
+    until: Optional[datetime]
+) -> np.ndarray:
+    """An (n, 5) int64 array of the league's matches, oldest first"""
+    statement = select(*_MATCH_COLUMNS).where(models.Match.league_id == league_id)
+    if since is not None:
+        statement = statement.where(models.Match.created_at >= since)
+    if until is not None:
+        statement = statement.where(models.Match.created_at <= until)
+    rows = db.execute(statement.order_by(models.Match.created_at.asc(), models.Match.id.asc())).all()
+    flat = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * len(_MATCH_COLUMNS))
+    return flat.reshape(len(rows), len(_MATCH_COLUMNS))
+
+def _streaks(player: np.ndarray, won: np.ndarray, size: int):
+    """Longest winning run and signed current run per player code.
+
+    Results are grouped by player with a stable sort, which keeps each
+    player's history in order, then run-length encoded.
+    """
+    win_streak = np.zeros(size, dtype=np.int64)
+    current_streak = np.zeros(size, dtype=np.int64)
+    if not len(player):
+        return win_streak, current_streak
+
+    order = np.argsort(player, kind="stable")
+    player, won = player[order], won[order]
+
+    starts = np.flatnonzero(np.r_[True, (player[1:] != player[:-1]) | (won[1:] != won[:-1])])
+    lengths = np.diff(np.r_[starts, len(player)])
+    run_player, run_won = player[starts], won[starts]
+
+    np.maximum.at(win_streak, run_player[run_won], lengths[run_won])
+
+    # A player's last run is the one before the next player's first
+    last = np.flatnonzero(np.r_[run_player[1:] != run_player[:-1], True])
+    current_streak[run_player[last]] = np.where(run_won[last], lengths[last], -lengths[last])
+    return win_streak, current_streak
+
+def stat_rows(
+    keys: np.ndarray,
+    names: List[str],
+    registered: np.ndarray,
+    player1: np.ndarray,
+    player2: np.ndarray,
+    score1: np.ndarray,
+    score2: np.ndarray,
+    winner_side: np.ndarray
+) -> List[StatRow]:
+    """Per-player aggregates from match columns given oldest first.
+
+    ``keys`` are the league's player keys in ascending order, named by
+    ``names``; players without results are only kept where ``registered``.
+    """
+    # Player codes are positions in the sorted keys; one result per side, in
+    # the order the orm engine applies them
+    player = np.searchsorted(keys, np.column_stack((player1, player2))).ravel()
+    score = np.column_stack((score1, score2)).ravel()
+    # Self-matches count as a win for both sides, as in the orm engine
+    same = player1 == player2
+    won = np.column_stack(((winner_side == 1) | same, (winner_side == 2) | same)).ravel()
+
+    size = len(keys)
+    played = np.bincount(player, minlength=size)
+    wins = np.bincount(player[won], minlength=size)
+    totals = np.bincount(player, weights=score, minlength=size).astype(np.int64)
+    highest = np.zeros(size, dtype=np.int64)
+    np.maximum.at(highest, player, score)
+    win_streak, current_streak = _streaks(player, won, size)
+
+    return [
+        StatRow(
+            player_name=name,
+            matches_played=int(played[code]),
+            matches_won=int(wins[code]),
+            matches_lost=int(played[code] - wins[code]),
+            total_score=int(totals[code]),
+            highest_score=int(highest[code]),
+            current_streak=int(current_streak[code]),
+            win_streak=int(win_streak[code])
+        )
+        for code, name in enumerate(names)
+        if played[code] or registered[code]
+    ]
+
+def get_player_stat_rows(
+    db: Session,
+    league_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> List[StatRow]:
+    """Per-player aggregates shaped like ``models.PlayerStat`` rows.
+
+    With ``since``/``until`` only matches in that window count, and players
+    registered after ``until`` are left out, as in ``crud``'s window path.
+    """
+    registered = (models.Player.created_at <= until) if until is not None else true()
+    players = db.query(models.Player.pk, models.Player.name, registered.label("registered"))\
+        .filter(models.Player.league_id == league_id)\
+        .order_by(models.Player.pk)\
+        .all()
+    matches = _load_matches(db, league_id, since, until)
+    return stat_rows(
+        np.array([player.pk for player in players], dtype=np.int64),
+        [player.name for player in players],
+        np.array([bool(player.registered) for player in players], dtype=bool),
+        *matches.T
+    )
+
+def player_stat_row(player_name: str, score: np.ndarray, won: np.ndarray) -> StatRow:
+    """Aggregates of one player from their results given oldest first"""
+    win_streak, current_streak = _streaks(np.zeros(len(won), dtype=np.int64), won, 1)
+    wins = int(np.count_nonzero(won))
+    return StatRow(
+        player_name=player_name,
+        matches_played=len(won),
+        matches_won=wins,
+        matches_lost=len(won) - wins,
+        total_score=int(score.sum()),
+        highest_score=int(score.max(initial=0)),
+        current_streak=int(current_streak[0]),
+        win_streak=int(win_streak[0])
+    )
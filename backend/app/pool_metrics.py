@@ -0,0 +1,119 @@
+"""Connection pool instrumentation.
+
+SQLAlchemy pool events give us connects, checkouts and checkins, but there is
+no event for the moment a checkout starts waiting, so the pools below time
+``_do_get`` themselves to build the checkout wait histogram.
+"""
+import os
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds of the checkout wait histogram buckets, in milliseconds
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            if timed_out:
+                self.timeouts += 1
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if ms <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def histogram(self) -> List[Dict]:
+        bounds = [*WAIT_BUCKETS_MS, "+Inf"]
+        return [{"le_ms": bound, "count": count} for bound, count in zip(bounds, self.wait_buckets)]
+
+_metrics: Dict[str, PoolMetrics] = {}
+_engines: Dict[str, object] = {}
+
+class _TimedCheckout:
+    """Mixin recording how long each checkout waited for a connection"""
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+def instrument(engine, name: str) -> None:
+    """Attach metrics to an engine created with one of the timed pool classes"""
+    metrics = _metrics.setdefault(name, PoolMetrics(name))
+    pool = engine.pool
+    pool.metrics = metrics
+    _engines[name] = engine
+
+    event.listen(pool, "connect", lambda *args: metrics.increment("connects"))
+    event.listen(pool, "checkout", lambda *args: metrics.increment("checkouts"))
+    event.listen(pool, "checkin", lambda *args: metrics.increment("checkins"))
+    event.listen(pool, "invalidate", lambda *args: metrics.increment("invalidations"))
+
+def snapshot() -> Dict:
+    """Current state of every instrumented pool in this worker process"""
+    pools = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        metrics = _metrics[name]
+        pools[name] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+            "connects": metrics.connects,
+            "checkouts": metrics.checkouts,
+            "checkins": metrics.checkins,
+            "invalidations": metrics.invalidations,
+            "timeouts": metrics.timeouts,
+            "checkout_wait": {
+                "count": metrics.wait_count,
+                "total_ms": round(metrics.wait_total_ms, 3),
+                "max_ms": round(metrics.wait_max_ms, 3),
+                "histogram": metrics.histogram(),
+            },
+        }
+    return {"pid": os.getpid(), "pools": pools}
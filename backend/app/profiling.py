@@ -0,0 +1,216 @@
+"""Per-request profiling.
+
+``ProfilingMiddleware`` times every HTTP request. Cursor events on the
+instrumented engines count its queries and the time spent in them.
+``database.run`` marks the non-database time spent inside ``crud`` (ORM
+hydration and Python aggregation). What remains between the last crud call
+and the response start is mostly response validation and serialization.
+
+The breakdown goes out as a ``Server-Timing`` header and as one JSON log line
+per request. A sampled share of requests can also run under cProfile; their
+profiles are kept when the request is slower than a threshold. The crud calls
+``database.run`` hands to worker threads get profilers of their own, merged
+into the request's profile.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger("versus.requests")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+class RequestProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.phases: Dict[str, float] = {}
+        self.last_phase_end: Optional[float] = None
+        self.response_start: Optional[float] = None
+        # Set on sampled requests; worker threads add their own profilers
+        self.profiler: Optional[cProfile.Profile] = None
+        self.thread_profilers: List[cProfile.Profile] = []
+
+    def timings_ms(self, until: float) -> Dict[str, float]:
+        timings = {"db": self.db_seconds * 1000}
+        timings.update((name, seconds * 1000) for name, seconds in self.phases.items())
+        if self.last_phase_end is not None and self.response_start is not None:
+            timings["serialize"] = (self.response_start - self.last_phase_end) * 1000
+        timings["total"] = (until - self.start) * 1000
+        return {name: round(ms, 3) for name, ms in timings.items()}
+
+    def server_timing(self) -> str:
+        entries = []
+        for name, ms in self.timings_ms(self.response_start).items():
+            desc = f';desc="{self.queries} queries"' if name == "db" else ""
+            entries.append(f"{name};dur={ms}{desc}")
+        return ", ".join(entries)
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Attribute the non-database time of the block to ``name``"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    db_before = profile.db_seconds
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        spent = (end - start) - (profile.db_seconds - db_before)
+        profile.phases[name] = profile.phases.get(name, 0.0) + spent
+        profile.last_phase_end = end
+
+T = TypeVar("T")
+
+def profiled(fn: Callable[[], T]) -> Callable[[], T]:
+    """Wrap a call bound for a worker thread so a sampled request's profile covers it.
+
+    cProfile only sees the thread it was enabled on, and the request's own
+    profiler runs on the event loop.
+    """
+    profile = _current.get()
+    if profile is None or profile.profiler is None:
+        return fn
+
+    def call() -> T:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return fn()
+        try:
+            return fn()
+        finally:
+            profiler.disable()
+            profile.thread_profilers.append(profiler)
+    return call
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profiling_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    starts = conn.info.get("profiling_query_start")
+    if profile is None or not starts:
+        return
+    profile.queries += 1
+    profile.db_seconds += time.perf_counter() - starts.pop()
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("profiling_query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+def instrument(engine) -> None:
+    """Count queries run on a (sync) engine towards the current request"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+# cProfile hooks the whole interpreter thread, so only one request is sampled at a time
+_profiler_lock = threading.Lock()
+
+class ProfilingMiddleware:
+    def __init__(self, app, sample_rate: float = 0.0, slow_ms: float = 500.0, profile_dir: str = "profiles"):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.profile_dir = profile_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        profiler = profile.profiler = self._start_profiler()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                profile.response_start = time.perf_counter()
+                MutableHeaders(scope=message).append("Server-Timing", profile.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end = time.perf_counter()
+            _current.reset(token)
+            record = {
+                "event": "request",
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "queries": profile.queries,
+                "timings_ms": profile.timings_ms(end),
+            }
+            if profiler is not None:
+                profiler.disable()
+                _profiler_lock.release()
+                if record["timings_ms"]["total"] >= self.slow_ms:
+                    record["profile"] = self._save_profile([profiler] + profile.thread_profilers, scope)
+            logger.info(json.dumps(record))
+
+    def _start_profiler(self) -> Optional[cProfile.Profile]:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if not _profiler_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already active
+            _profiler_lock.release()
+            return None
+        return profiler
+
+    def _save_profile(self, profilers: List[cProfile.Profile], scope) -> Dict:
+        """Dump the merged profiles to a pstats file and summarise its top functions for the log line"""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-")[:80]
+        path = os.path.join(self.profile_dir, f"{int(time.time() * 1000)}-{scope['method']}-{slug}.prof")
+        stats = pstats.Stats(*profilers, stream=io.StringIO())
+        stats.dump_stats(path)
+
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        top = []
+        for (filename, line, function), (_, calls, _, cumulative, _) in list(stats.stats.items()):
+            top.append((cumulative, f"{os.path.basename(filename)}:{line}({function})", calls))
+        top.sort(reverse=True)
+        return {
+            "file": path,
+            "top": [
+                {"function": function, "calls": calls, "cumulative_ms": round(cumulative * 1000, 3)}
+                for cumulative, function, calls in top[:15]
+            ],
+        }
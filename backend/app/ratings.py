@@ -0,0 +1,225 @@
+"""Incremental Elo ratings.
+
+New matches that land after everything already rated are applied to the two
+players' rows in O(1). Edits to history replay from the nearest checkpoint
+stored before the edited match, rather than from the league's first match.
+Every ``RATING_CHECKPOINT_INTERVAL`` matches the engine stores a checkpoint.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import settings
+
+Position = Tuple[datetime, str]
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _position(created_at: datetime, match_id: str) -> Position:
+    return _as_utc(created_at), match_id
+
+def _after(column_created_at, column_id, position: Position):
+    """SQL predicate for rows strictly after ``position`` in (created_at, id) order"""
+    created_at, match_id = position
+    return (column_created_at > created_at) | ((column_created_at == created_at) & (column_id > match_id))
+
+def _elo(rating1: float, rating2: float, player1_won: bool) -> Tuple[float, float]:
+    expected1 = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+    delta = settings.RATING_K_FACTOR * ((1.0 if player1_won else 0.0) - expected1)
+    return rating1 + delta, rating2 - delta
+
+def _apply(match: Any, get_rating, set_rating) -> None:
+    if match.player1 == match.player2:
+        return
+    rating1, rating2 = _elo(
+        get_rating(match.player1),
+        get_rating(match.player2),
+        match.winner == match.player1
+    )
+    set_rating(match.player1, rating1)
+    set_rating(match.player2, rating2)
+
+def _state(db: Session, league_id: str) -> models.RatingState:
+    state = db.query(models.RatingState)\
+        .filter(models.RatingState.league_id == league_id)\
+        .with_for_update()\
+        .first()
+    if state is None:
+        state = models.RatingState(league_id=league_id, matches_applied=0)
+        db.add(state)
+    return state
+
+def _checkpoint(db: Session, league_id: str, state: models.RatingState, ratings: Dict[str, List]) -> None:
+    db.add(models.RatingCheckpoint(
+        league_id=league_id,
+        match_created_at=state.last_created_at,
+        match_id=state.last_match_id,
+        matches_applied=state.matches_applied,
+        ratings=ratings
+    ))
+
+def record_matches(db: Session, league_id: str, matches: Iterable[Any]) -> None:
+    """Rate newly inserted matches, given oldest first.
+
+    Falls back to a replay when a match lands before the last rated one.
+    """
+    matches = list(matches)
+    if not matches:
+        return
+
+    state = _state(db, league_id)
+    first = _position(matches[0].created_at, matches[0].id)
+    if state.last_created_at is not None and first <= _position(state.last_created_at, state.last_match_id):
+        replay_from(db, league_id, first)
+        return
+
+    names = {name for match in matches for name in (match.player1, match.player2)}
+    rows = {
+        row.player_name: row
+        for row in db.query(models.PlayerRating)
+            .filter(models.PlayerRating.league_id == league_id)
+            .filter(models.PlayerRating.player_name.in_(names))
+            .with_for_update()
+    }
+    for name in names - rows.keys():
+        rows[name] = models.PlayerRating(
+            league_id=league_id,
+            player_name=name,
+            rating=settings.RATING_INITIAL,
+            matches_rated=0
+        )
+        db.add(rows[name])
+
+    def set_rating(name: str, rating: float) -> None:
+        rows[name].rating = rating
+        rows[name].matches_rated += 1
+
+    interval = settings.RATING_CHECKPOINT_INTERVAL
+    for match in matches:
+        _apply(match, lambda name: rows[name].rating, set_rating)
+        state.matches_applied += 1
+        state.last_created_at, state.last_match_id = match.created_at, match.id
+        if state.matches_applied % interval == 0:
+            db.flush()
+            _checkpoint(db, league_id, state, {
+                row.player_name: [row.rating, row.matches_rated]
+                for row in db.query(models.PlayerRating).filter(models.PlayerRating.league_id == league_id)
+            })
+
+def replay_from(db: Session, league_id: str, position: Optional[Position] = None) -> int:
+    """Recompute ratings for every match at or after ``position``.
+
+    Starts from the latest checkpoint strictly before ``position`` (or from
+    scratch when there is none or no position is given) and drops checkpoints
+    the replay supersedes. Returns the number of matches replayed.
+    """
+    db.flush()
+    state = _state(db, league_id)
+    checkpoints = db.query(models.RatingCheckpoint)\
+        .filter(models.RatingCheckpoint.league_id == league_id)
+
+    start = None
+    if position is not None:
+        start = checkpoints\
+            .filter(~_after(models.RatingCheckpoint.match_created_at, models.RatingCheckpoint.match_id, position))\
+            .filter(~((models.RatingCheckpoint.match_created_at == position[0]) &
+                      (models.RatingCheckpoint.match_id == position[1])))\
+            .order_by(models.RatingCheckpoint.match_created_at.desc(), models.RatingCheckpoint.match_id.desc())\
+            .first()
+    if start is None:
+        checkpoints.delete(synchronize_session=False)
+        ratings: Dict[str, List] = {}
+        state.matches_applied = 0
+        state.last_created_at = state.last_match_id = None
+    else:
+        checkpoints\
+            .filter(_after(models.RatingCheckpoint.match_created_at, models.RatingCheckpoint.match_id,
+                           _position(start.match_created_at, start.match_id)))\
+            .delete(synchronize_session=False)
+        ratings = {name: list(value) for name, value in start.ratings.items()}
+        state.matches_applied = start.matches_applied
+        state.last_created_at, state.last_match_id = start.match_created_at, start.match_id
+
+    query = db.query(
+        models.Match.id,
+        models.Match.player1,
+        models.Match.player2,
+        models.Match.winner,
+        models.Match.created_at
+    ).filter(models.Match.league_id == league_id)
+    if start is not None:
+        query = query.filter(_after(models.Match.created_at, models.Match.id,
+                                    _position(start.match_created_at, start.match_id)))
+
+    def get_rating(name: str) -> float:
+        return ratings.setdefault(name, [settings.RATING_INITIAL, 0])[0]
+
+    def set_rating(name: str, rating: float) -> None:
+        ratings[name] = [rating, ratings[name][1] + 1]
+
+    interval = settings.RATING_CHECKPOINT_INTERVAL
+    replayed = 0
+    for match in query.order_by(models.Match.created_at.asc(), models.Match.id.asc()).yield_per(5000):
+        _apply(match, get_rating, set_rating)
+        replayed += 1
+        state.matches_applied += 1
+        state.last_created_at, state.last_match_id = match.created_at, match.id
+        if state.matches_applied % interval == 0:
+            _checkpoint(db, league_id, state, {name: list(value) for name, value in ratings.items()})
+
+    # Write the final ratings back over the league's rows
+    for row in db.query(models.PlayerRating).filter(models.PlayerRating.league_id == league_id):
+        value = ratings.pop(row.player_name, None)
+        if value is None:
+            db.delete(row)
+        else:
+            row.rating, row.matches_rated = value
+    db.add_all(
+        models.PlayerRating(league_id=league_id, player_name=name, rating=rating, matches_rated=count)
+        for name, (rating, count) in ratings.items()
+    )
+    return replayed
+
+def replay_from_match(db: Session, league_id: str, created_at: datetime, match_id: str) -> int:
+    return replay_from(db, league_id, _position(created_at, match_id))
+
+def get_ratings(db: Session, league_id: str, as_of: Optional[datetime] = None) -> Dict[str, float]:
+    """Current ratings, or ratings right after the last match up to ``as_of``.
+
+    Past ratings replay from the latest checkpoint at or before ``as_of``.
+    """
+    if as_of is None:
+        return dict(
+            db.query(models.PlayerRating.player_name, models.PlayerRating.rating)
+            .filter(models.PlayerRating.league_id == league_id)
+            .all()
+        )
+
+    as_of = _as_utc(as_of)
+    start = db.query(models.RatingCheckpoint)\
+        .filter(models.RatingCheckpoint.league_id == league_id)\
+        .filter(models.RatingCheckpoint.match_created_at <= as_of)\
+        .order_by(models.RatingCheckpoint.match_created_at.desc(), models.RatingCheckpoint.match_id.desc())\
+        .first()
+    ratings = {name: rating for name, (rating, _) in start.ratings.items()} if start else {}
+
+    query = db.query(models.Match.player1, models.Match.player2, models.Match.winner)\
+        .filter(models.Match.league_id == league_id)\
+        .filter(models.Match.created_at <= as_of)
+    if start is not None:
+        query = query.filter(_after(models.Match.created_at, models.Match.id,
+                                    _position(start.match_created_at, start.match_id)))
+
+    def set_rating(name: str, rating: float) -> None:
+        ratings[name] = rating
+
+    for match in query.order_by(models.Match.created_at.asc(), models.Match.id.asc()).yield_per(5000):
+        _apply(match, lambda name: ratings.get(name, settings.RATING_INITIAL), set_rating)
+    return ratings
+
+def delete_league(db: Session, league_id: str) -> None:
+    for model in (models.RatingCheckpoint, models.PlayerRating, models.RatingState):
+        db.query(model).filter(model.league_id == league_id).delete(synchronize_session=False)
@@ -0,0 +1,24 @@
+"""Rebuild the player_stats aggregates and Elo ratings from the matches table.
+
+Usage:
+    python -m app.rebuild_stats                # every league
+    python -m app.rebuild_stats <league_id>... # only the given leagues
+"""
+import sys
+
+from . import crud
+from .database import SessionLocal
+
+def main(league_ids: list[str]) -> None:
+    db = SessionLocal()
+    try:
+        if not league_ids:
+            league_ids = [league.id for league in crud.get_leagues(db)]
+        for league_id in league_ids:
+            rows = crud.rebuild_player_stats(db, league_id)
+            print(f"Rebuilt {rows} player stats for league {league_id}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
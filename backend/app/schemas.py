@@ -35,6 +35,9 @@ class MatchCreate(MatchBase):
 class MatchUpdate(MatchBase):
     pass
 
+class MatchImport(MatchBase):
+    created_at: Optional[datetime] = None
+
 class MatchResponse(MatchBase):
     id: str
     league_id: str
@@ -58,6 +61,85 @@ class PlayerStats(BaseModel):
     highest_score: int = 0
     win_streak: int = 0
     current_streak: int = 0
+    rating: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class RankedPlayer(PlayerStats):
+    rank: int
+
+# A player's place in the rankings and the players around them
+class PlayerRank(BaseModel):
+    rank: int
+    total_players: int
+    player: RankedPlayer
+    above: List[RankedPlayer] = []
+    below: List[RankedPlayer] = []
+
+# Player profile schemas
+class OpponentRecord(BaseModel):
+    opponent: str
+    matches_played: int
+    matches_won: int
+    matches_lost: int
+    win_rate: float
+    average_score: float
+    average_opponent_score: float
+
+class SeriesPoint(BaseModel):
+    match: int
+    created_at: datetime
+    value: float
+
+class PlayerSeries(BaseModel):
+    window: int
+    matches: int
+    win_rate: List[SeriesPoint] = []
+    average_score: List[SeriesPoint] = []
+
+class PlayerProfile(BaseModel):
+    stats: PlayerStats
+    opponents: List[OpponentRecord] = []
+    series: PlayerSeries
+
+class LeagueStats(BaseModel):
+    total_matches: int = 0
+    total_players: int = 0
+    average_score: float = 0.0
+    highest_score: int = 0
+
+# Dashboard schema; only the requested views are present
+class Dashboard(BaseModel):
+    league: LeagueResponse
+    stats: Optional[LeagueStats] = None
+    rankings: Optional[List[PlayerStats]] = None
+    player_stats: Optional[List[PlayerStats]] = None
+    recent: Optional[List[MatchResponse]] = None
+
+# Bulk import schemas
+class BulkImportError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResponse(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BulkImportError]
+    elapsed_ms: float
+    rows_per_second: float
+
+# Background job schema
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    league_id: str
+    status: str
+    progress: int = 0
+    total: Optional[int] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,43 @@
+"""Rolling aggregates and downsampling of per-match time series.
+
+A player's chart series has one point per match. It is computed in full with
+cumulative sums, then reduced to a fixed number of points, so responses stay
+the same size however long the history gets.
+"""
+import numpy as np
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of each value and up to ``window - 1`` values before it"""
+    sums = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    return (sums[end] - sums[start]) / (end - start)
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indexes of ``threshold`` points picked by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Between them the points are
+    split into equal buckets, and from each the point forming the largest
+    triangle with the previously kept point and the next bucket's average is
+    kept, which holds on to peaks and troughs that bucket averages smooth out.
+    """
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The next bucket's average; the last bucket looks at the final point
+        next_start, next_end = (edges[bucket + 1], edges[bucket + 2]) if bucket + 2 < len(edges) else (size - 1, size)
+        next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        picked[bucket + 1] = previous
+    return picked
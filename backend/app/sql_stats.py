@@ -0,0 +1,129 @@
+"""Statistics computed inside the database.
+
+Each function mirrors its counterpart in ``crud`` but lets the database unpivot,
+group and window over the league's matches so only per-player rows come back.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, union, union_all, case, func, literal, Integer
+from typing import Dict, List, Any
+from . import models
+
+STAT_FIELDS = (
+    "matches_played",
+    "matches_won",
+    "matches_lost",
+    "total_score",
+    "highest_score",
+    "current_streak",
+    "win_streak",
+)
+
+def _results(league_id: str):
+    """One row per (match, player): the matches table unpivoted with UNION ALL"""
+    m = models.Match
+    sides = [
+        select(
+            player.label("player_name"),
+            score.label("score"),
+            case((m.winner == player, 1), else_=0).label("won"),
+            m.created_at.label("created_at"),
+            m.id.label("match_id")
+        ).where(m.league_id == league_id)
+        for player, score in ((m.player1, m.player1_score), (m.player2, m.player2_score))
+    ]
+    return union_all(*sides).cte("results")
+
+def get_player_stat_rows(db: Session, league_id: str) -> List[Any]:
+    """Per-player aggregates shaped like ``models.PlayerStat`` rows"""
+    results = _results(league_id)
+
+    totals = select(
+        results.c.player_name,
+        func.count().label("matches_played"),
+        func.sum(results.c.won).label("matches_won"),
+        func.sum(results.c.score).label("total_score"),
+        func.max(case((results.c.score > 0, results.c.score), else_=0)).label("highest_score")
+    ).group_by(results.c.player_name).subquery("totals")
+
+    # Gaps and islands: consecutive equal results share the same rank difference
+    order = (results.c.created_at, results.c.match_id)
+    numbered = select(
+        results.c.player_name,
+        results.c.won,
+        func.row_number().over(partition_by=results.c.player_name, order_by=order).label("seq"),
+        (
+            func.row_number().over(partition_by=results.c.player_name, order_by=order)
+            - func.row_number().over(partition_by=(results.c.player_name, results.c.won), order_by=order)
+        ).label("island")
+    ).subquery("numbered")
+
+    islands = select(
+        numbered.c.player_name,
+        numbered.c.won,
+        func.count().label("length"),
+        func.max(numbered.c.seq).label("last_seq")
+    ).group_by(numbered.c.player_name, numbered.c.won, numbered.c.island).subquery("islands")
+
+    ranked_islands = select(
+        islands,
+        func.row_number().over(
+            partition_by=islands.c.player_name,
+            order_by=islands.c.last_seq.desc()
+        ).label("recency")
+    ).subquery("ranked_islands")
+
+    streaks = select(
+        ranked_islands.c.player_name,
+        func.max(case((ranked_islands.c.won == 1, ranked_islands.c.length), else_=0)).label("win_streak"),
+        func.max(case(
+            (ranked_islands.c.recency == 1,
+             case((ranked_islands.c.won == 1, ranked_islands.c.length), else_=-ranked_islands.c.length)),
+            else_=None
+        )).label("current_streak")
+    ).group_by(ranked_islands.c.player_name).subquery("streaks")
+
+    played = select(
+        totals.c.player_name,
+        totals.c.matches_played,
+        totals.c.matches_won,
+        (totals.c.matches_played - totals.c.matches_won).label("matches_lost"),
+        totals.c.total_score,
+        totals.c.highest_score,
+        streaks.c.current_streak,
+        streaks.c.win_streak
+    ).join_from(totals, streaks, totals.c.player_name == streaks.c.player_name)
+
+    # Registered players who have not played yet
+    zero = literal(0, Integer)
+    unplayed = select(
+        models.Player.name,
+        *[zero.label(field) for field in STAT_FIELDS]
+    ).where(models.Player.league_id == league_id)\
+        .where(models.Player.name.not_in(select(results.c.player_name)))\
+        .distinct()
+
+    return db.execute(union_all(played, unplayed)).all()
+
+def get_league_stats(db: Session, league_id: str) -> Dict:
+    m = models.Match
+    total_matches, total_score, highest_score = db.execute(
+        select(
+            func.count(),
+            func.sum(m.player1_score + m.player2_score),
+            func.max(case((m.player1_score > m.player2_score, m.player1_score), else_=m.player2_score))
+        ).where(m.league_id == league_id)
+    ).one()
+
+    names = union(
+        select(m.player1).where(m.league_id == league_id),
+        select(m.player2).where(m.league_id == league_id),
+        select(models.Player.name).where(models.Player.league_id == league_id)
+    ).subquery("names")
+    total_players = db.execute(select(func.count()).select_from(names)).scalar_one()
+
+    return {
+        "total_matches": total_matches,
+        "total_players": total_players,
+        "average_score": total_score / (total_matches * 2) if total_matches else 0,
+        "highest_score": max(highest_score or 0, 0)
+    }
@@ -0,0 +1,10 @@
+"""Performance benchmarks for the crud layer.
+
+Benchmarks open their own scratch database, so the app's settings only need
+to load: the required names are filled in, with an in-memory SQLite
+DATABASE_URL the app's engine never connects to, unless they are already set.
+"""
+import os
+
+for key, value in dict(PROJECT_NAME="Versus", VERSION="bench", DATABASE_URL="sqlite://").items():
+    os.environ.setdefault(key, value)
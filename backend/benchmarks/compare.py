@@ -0,0 +1,41 @@
+"""Compare two ``benchmarks.run`` result files by median time.
+
+Usage (from backend/):
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 1.1]
+
+Exits with status 1 when any operation got slower than ``threshold`` times
+its baseline median.
+"""
+import argparse
+import json
+import sys
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=1.1)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["config"] != candidate["config"]:
+        print(f"warning: configs differ: {baseline['config']} vs {candidate['config']}", file=sys.stderr)
+
+    regressed = False
+    print(f"{'operation':<28}{'baseline ms':>14}{'candidate ms':>14}{'ratio':>8}")
+    for name, result in candidate["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<28}{'-':>14}{result['median_ms']:>14.3f}{'new':>8}")
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        flag = " !" if ratio > args.threshold else ""
+        regressed = regressed or bool(flag)
+        print(f"{name:<28}{before['median_ms']:>14.3f}{result['median_ms']:>14.3f}{ratio:>8.2f}{flag}")
+    sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
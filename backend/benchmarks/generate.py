@@ -0,0 +1,92 @@
+"""Synthetic leagues for benchmarks.
+
+Players are drawn with Zipf-like weights, so with ``skew > 0`` a few heavy
+players appear in most matches, as in real leagues with regulars.
+
+Usage (from backend/):
+    python -m benchmarks.generate [--database-url URL] [--players 100] [--matches 100000] [--skew 1.0]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import crud, models, schemas
+
+DEFAULT_DATABASE_URL = "sqlite:///benchmark.db"
+
+def open_database(url: str) -> Tuple[object, sessionmaker]:
+    """Engine and session factory for a scratch database, with the schema created"""
+    engine = create_engine(url)
+    models.Base.metadata.create_all(engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def player_names(players: int) -> List[str]:
+    return [f"player{i:04d}" for i in range(players)]
+
+def generate_matches(
+    players: int,
+    matches: int,
+    skew: float = 1.0,
+    seed: int = 0,
+    span_days: int = 365
+) -> List[schemas.MatchImport]:
+    """``matches`` random results, oldest first, spread evenly over ``span_days``"""
+    rng = random.Random(seed)
+    names = player_names(players)
+    weights = [1 / (rank + 1) ** skew for rank in range(players)]
+    start = datetime.now(timezone.utc) - timedelta(days=span_days)
+    step = timedelta(days=span_days) / max(matches, 1)
+
+    results = []
+    for i in range(matches):
+        player1, player2 = rng.choices(names, weights, k=2)
+        while player2 == player1:
+            player2 = rng.choices(names, weights)[0]
+        results.append(schemas.MatchImport(
+            player1=player1,
+            player2=player2,
+            player1_score=rng.randint(0, 21),
+            player2_score=rng.randint(0, 21),
+            created_at=start + step * i
+        ))
+    return results
+
+def seed_league(
+    db: Session,
+    players: int,
+    matches: int,
+    skew: float = 1.0,
+    seed: int = 0,
+    name: str = "benchmark"
+) -> models.League:
+    """Create a league with registered players and a generated match history"""
+    league = crud.create_league(db, schemas.LeagueCreate(name=name))
+    for player_name in player_names(players):
+        crud.create_player(db, league.id, player_name)
+    crud.create_matches_bulk(db, league.id, generate_matches(players, matches, skew, seed))
+    return league
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--matches", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine, SessionLocal = open_database(args.database_url)
+    db = SessionLocal()
+    try:
+        league = seed_league(db, args.players, args.matches, args.skew, args.seed)
+        print(league.id)
+    finally:
+        db.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Cost of keeping Elo ratings current on a large league.
+
+Seeds one league into a throwaway SQLite database, then times an appended
+match, edits near the end and in the middle of history, and a full replay.
+
+Usage (from backend/):
+    python -m benchmarks.rating_replay [--matches 100000] [--players 200] [--interval 1000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app import crud, models, ratings, schemas
+from app.database import settings
+
+from .generate import generate_matches, open_database, player_names
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=100_000)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--interval", type=int, default=settings.RATING_CHECKPOINT_INTERVAL)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings.CACHE_ENABLED = False
+    settings.RATING_CHECKPOINT_INTERVAL = args.interval
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, SessionLocal = open_database(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        db = SessionLocal()
+
+        league = crud.create_league(db, schemas.LeagueCreate(name="bench"))
+        players = player_names(args.players)
+        # No skew: every player keeps a rating worth updating
+        imports = generate_matches(args.players, args.matches, skew=0, seed=args.seed)
+        seed_ms, _ = _timed(lambda: crud.create_matches_bulk(db, league.id, imports))
+
+        def edit_at(index: int) -> float:
+            match = db.query(models.Match)\
+                .filter(models.Match.league_id == league.id)\
+                .order_by(models.Match.created_at.asc(), models.Match.id.asc())\
+                .offset(index)\
+                .first()
+            update = schemas.MatchUpdate(
+                player1=match.player1,
+                player2=match.player2,
+                player1_score=match.player2_score,
+                player2_score=match.player1_score
+            )
+            return _timed(lambda: crud.update_match(db, match.id, update))[0]
+
+        append_ms, _ = _timed(lambda: crud.create_match(db, league.id, schemas.MatchCreate(
+            player1=players[0], player2=players[1], player1_score=3, player2_score=1
+        )))
+        near_end_ms = edit_at(args.matches - 10)
+        middle_ms = edit_at(args.matches // 2)
+
+        def full_replay():
+            replayed = ratings.replay_from(db, league.id)
+            db.commit()
+            return replayed
+        full_ms, replayed = _timed(full_replay)
+
+        print(json.dumps({
+            "benchmark": "rating_replay",
+            "matches": args.matches,
+            "players": args.players,
+            "checkpoint_interval": args.interval,
+            "checkpoints": db.query(models.RatingCheckpoint).count(),
+            "seed_ms": round(seed_ms, 1),
+            "append_ms": round(append_ms, 2),
+            "edit_near_end_ms": round(near_end_ms, 2),
+            "edit_middle_ms": round(middle_ms, 2),
+            "full_replay_ms": round(full_ms, 1),
+            "full_replay_matches": replayed,
+        }, indent=2))
+        db.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Time the crud hot paths on a synthetic league and write the results as JSON.
+
+Each operation runs ``--repeat`` times after one warm-up call, with the
+read cache and the in-memory match log disabled so every call reaches the
+database through the selected engine. ``--match-log`` times the reads the
+log serves instead. ``delete_league`` destroys its league, so it runs once
+on a separately seeded copy.
+
+Usage (from backend/):
+    python -m benchmarks.run [--database-url URL] [--players 100] [--matches 100000]
+                             [--skew 1.0] [--repeat 20] [--engine orm|sql|numpy] [--match-log]
+                             [--output results.json]
+
+Compare two result files with ``python -m benchmarks.compare old.json new.json``.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from app import crud, jobs, schemas
+from app.database import settings
+
+from .generate import open_database, player_names, seed_league
+
+def _summary(samples: List[float]) -> Dict:
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+def _time(fn: Callable, repeat: int, warmup: bool = True) -> Dict:
+    if warmup:
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return _summary(samples)
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args: argparse.Namespace) -> Dict:
+    settings.CACHE_ENABLED = False
+    settings.MATCH_LOG_ENABLED = args.match_log
+    settings.STATS_ENGINE = args.engine
+
+    engine, SessionLocal = open_database(args.database_url)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        league = seed_league(db, args.players, args.matches, args.skew, args.seed)
+        seed_ms = (time.perf_counter() - start) * 1000
+
+        names = player_names(args.players)
+        heavy, second, light = names[0], names[1], names[-1]
+        deep_offset = max(args.matches - 50, 0)
+        new_match = schemas.MatchCreate(player1=heavy, player2=light, player1_score=21, player2_score=7)
+
+        operations = {
+            "get_rankings": lambda: crud.get_rankings(db, league.id),
+            # A window that starts before the first match scans the whole history
+            "get_rankings.window": lambda: crud.get_rankings(db, league.id, since=datetime(2000, 1, 1, tzinfo=timezone.utc)),
+            "get_player_stats.heavy": lambda: crud.get_player_stats(db, league.id, heavy),
+            "get_player_stats.light": lambda: crud.get_player_stats(db, league.id, light),
+            "get_player_profile.heavy": lambda: crud.get_player_profile(db, league.id, heavy),
+            "get_head_to_head": lambda: crud.get_head_to_head(db, league.id, heavy, second),
+            "get_league_stats": lambda: crud.get_league_stats(db, league.id),
+            "get_matches.first_page": lambda: crud.get_matches(db, league.id, limit=50),
+            "get_matches.deep_offset": lambda: crud.get_matches(db, league.id, limit=50, offset=deep_offset),
+            "create_match": lambda: crud.create_match(db, league.id, new_match),
+        }
+        results = {}
+        for name, fn in operations.items():
+            results[name] = _time(fn, args.repeat)
+            db.rollback()
+
+        doomed = seed_league(db, args.players, args.matches, args.skew, args.seed, name="benchmark-delete")
+        def delete_league(league_id: str) -> None:
+            # Queue the deletion job and run it here, as a worker would
+            jobs.run_job(db, crud.delete_league(db, league_id))
+
+        results["delete_league"] = _time(lambda: delete_league(doomed.id), 1, warmup=False)
+        delete_league(league.id)
+    finally:
+        db.close()
+        engine.dispose()
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "config": {
+            "players": args.players,
+            "matches": args.matches,
+            "skew": args.skew,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "engine": args.engine,
+            "match_log": args.match_log,
+        },
+        "seed_ms": round(seed_ms, 1),
+        "results": results,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--matches", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--engine", choices=("orm", "sql", "numpy"), default="orm")
+    parser.add_argument("--match-log", action="store_true", help="serve reads from the warm in-memory match log")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        with tempfile.TemporaryDirectory() as tmp:
+            args.database_url = f"sqlite:///{os.path.join(tmp, 'benchmark.db')}"
+            report = run(args)
+    else:
+        report = run(args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
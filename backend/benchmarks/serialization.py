@@ -0,0 +1,96 @@
+"""Cost of serializing large list responses.
+
+Seeds a league with ``--rows`` players and matches into a throwaway SQLite
+database. It then times a page of ``--rows`` matches and the full rankings two
+ways. "validated" is the path list endpoints used to take: ORM objects or
+pydantic models run through response_model validation and the stdlib JSON
+encoder. "direct" is the current one: plain rows from ``crud`` dumped with orjson.
+
+Usage (from backend/):
+    python -m benchmarks.serialization [--rows 10000] [--repeat 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app import crud, models, schemas
+from app.database import settings
+
+from .generate import open_database, seed_league
+
+def _median_ms(fn: Callable, repeat: int) -> float:
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 2)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    settings.CACHE_ENABLED = False
+    settings.MATCH_LOG_ENABLED = False
+    matches_adapter = TypeAdapter(List[schemas.MatchResponse])
+    stats_adapter = TypeAdapter(List[schemas.PlayerStats])
+
+    def validated(adapter: TypeAdapter, content) -> bytes:
+        # What FastAPI does with a response_model: validate, dump, json.dumps
+        value = adapter.validate_python(content, from_attributes=True)
+        return json.dumps(adapter.dump_python(value, mode="json")).encode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, SessionLocal = open_database(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        db = SessionLocal()
+        # No skew, so nearly every player shows up in the rankings
+        league = seed_league(db, args.rows, args.rows, skew=0)
+
+        def matches_validated() -> bytes:
+            matches = db.query(models.Match)\
+                .filter(models.Match.league_id == league.id)\
+                .order_by(models.Match.created_at.desc(), models.Match.id)\
+                .limit(args.rows)\
+                .all()
+            body = validated(matches_adapter, matches)
+            db.expunge_all()
+            return body
+
+        def matches_direct() -> bytes:
+            return orjson.dumps([match._asdict() for match in crud.get_matches(db, league.id, limit=args.rows)])
+
+        def rankings_validated() -> bytes:
+            return validated(stats_adapter, [schemas.PlayerStats(**row) for row in crud.get_rankings(db, league.id)])
+
+        def rankings_direct() -> bytes:
+            return orjson.dumps(crud.get_rankings(db, league.id))
+
+        assert json.loads(matches_validated()) == json.loads(matches_direct())
+        assert json.loads(rankings_validated()) == json.loads(rankings_direct())
+        results = {
+            "matches_validated_ms": _median_ms(matches_validated, args.repeat),
+            "matches_direct_ms": _median_ms(matches_direct, args.repeat),
+            "rankings_validated_ms": _median_ms(rankings_validated, args.repeat),
+            "rankings_direct_ms": _median_ms(rankings_direct, args.repeat),
+        }
+        print(json.dumps({
+            "benchmark": "serialization",
+            "rows": args.rows,
+            "ranked_players": len(crud.get_rankings(db, league.id)),
+            **results,
+        }, indent=2))
+        db.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
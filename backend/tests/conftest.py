@@ -0,0 +1,40 @@
+"""Fixtures for tests against a throwaway SQLite database.
+
+Settings are read when ``app`` is imported, so the environment is filled in
+before any test module imports it.
+"""
+import os
+import tempfile
+
+_directory = tempfile.mkdtemp(prefix="versus-tests-")
+os.environ.update(
+    PROJECT_NAME="Versus",
+    VERSION="test",
+    DATABASE_URL=f"sqlite:///{os.path.join(_directory, 'versus.db')}",
+    JOBS_WORKERS="0",
+)
+
+import pytest
+
+from app import crud, models, schemas
+from app.database import SessionLocal, engine
+
+@pytest.fixture
+def db():
+    models.Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        models.Base.metadata.drop_all(engine)
+
+@pytest.fixture
+def league(db):
+    return crud.create_league(db, schemas.LeagueCreate(name="Test league"))
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
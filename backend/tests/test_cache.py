@@ -0,0 +1,19 @@
+from app import crud, schemas
+from app.cache import cache
+
+def test_etag_never_pairs_with_a_stale_cached_body(db, league, client, monkeypatch):
+    crud.create_match(db, league.id, schemas.MatchCreate(player1="alice", player2="bob", player1_score=3, player2_score=1))
+    first = client.get(f"/api/leagues/{league.id}/stats")
+    assert first.json()["total_matches"] == 1
+
+    # A write in another worker leaves this worker's cache in place
+    monkeypatch.setattr(cache, "invalidate_league", lambda league_id: None)
+    crud.create_match(db, league.id, schemas.MatchCreate(player1="bob", player2="alice", player1_score=2, player2_score=0))
+
+    second = client.get(f"/api/leagues/{league.id}/stats")
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json()["total_matches"] == 2
+    assert client.get(
+        f"/api/leagues/{league.id}/stats",
+        headers={"If-None-Match": second.headers["ETag"]}
+    ).status_code == 304
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import crud, models, schemas
+from app.coalescer import MatchCoalescer
+
+def _submit_all(coalescer, league_id, submissions):
+    async def submit_all():
+        return await asyncio.gather(*(
+            coalescer.submit(league_id, match, key) for match, key in submissions
+        ), return_exceptions=True)
+    return asyncio.run(submit_all())
+
+def _create(player1, player2, player1_score=3, player2_score=1):
+    return schemas.MatchCreate(player1=player1, player2=player2, player1_score=player1_score, player2_score=player2_score)
+
+def test_batch_gives_each_caller_its_own_match(db, league):
+    coalescer = MatchCoalescer(window_ms=50, max_batch=10)
+    submissions = [(_create("alice", "bob"), None), (_create("bob", "carol"), None), (_create("carol", "dave"), "k")]
+    results = _submit_all(coalescer, league.id, submissions)
+
+    assert coalescer.stats()["batches"] == 1
+    assert coalescer.stats()["fallbacks"] == 0
+    assert [(match.player1, match.player2) for match in results] == [("alice", "bob"), ("bob", "carol"), ("carol", "dave")]
+    assert db.query(models.Match).filter(models.Match.league_id == league.id).count() == 3
+
+def test_failed_batch_falls_back_to_one_transaction_each(db, league):
+    crud.create_match(db, league.id, _create("zoe", "bob"))
+    crud.delete_player(db, league.id, "zoe")
+    coalescer = MatchCoalescer(window_ms=50, max_batch=10)
+    results = _submit_all(coalescer, league.id, [(_create("alice", "bob"), None), (_create("zoe", "carol"), None)])
+
+    assert coalescer.stats()["fallbacks"] == 1
+    assert (results[0].player1, results[0].player2) == ("alice", "bob")
+    assert isinstance(results[1], crud.PlayerDeletedError)
+    assert db.query(models.Match).filter(models.Match.player1 == "alice").count() == 1
+
+def test_key_repeated_within_a_batch_records_one_match(db, league):
+    coalescer = MatchCoalescer(window_ms=50, max_batch=10)
+    first, retry = _submit_all(coalescer, league.id, [(_create("alice", "bob"), "k"), (_create("alice", "bob"), "k")])
+
+    assert first.id == retry.id
+    assert db.query(models.Match).filter(models.Match.league_id == league.id).count() == 1
+
+def test_create_match_returns_the_match_a_concurrent_request_recorded(db, league, monkeypatch):
+    recorded = crud.create_match(db, league.id, _create("alice", "bob"), "k")
+    lookup = crud._matches_by_idempotency_key
+    calls = []
+    def racing_lookup(db, league_id, keys):
+        # The first lookup runs before the other request commits
+        calls.append(keys)
+        return {} if len(calls) == 1 else lookup(db, league_id, keys)
+    monkeypatch.setattr(crud, "_matches_by_idempotency_key", racing_lookup)
+
+    assert crud.create_match(db, league.id, _create("alice", "bob"), "k").id == recorded.id
+    assert len(calls) == 2
+    assert db.query(models.Match).filter(models.Match.league_id == league.id).count() == 1
+
+def test_create_match_reraises_when_the_key_is_still_missing(db, league, monkeypatch):
+    crud.create_match(db, league.id, _create("alice", "bob"), "k")
+    monkeypatch.setattr(crud, "_matches_by_idempotency_key", lambda db, league_id, keys: {})
+    with pytest.raises(IntegrityError):
+        crud.create_match(db, league.id, _create("alice", "bob"), "k")
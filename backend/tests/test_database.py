@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from anyio import to_thread
+from pydantic import ValidationError
+
+from app.database import SessionLocal, Settings, run, settings
+from app.main import app
+
+def test_run_keeps_sync_sessions_off_the_event_loop(db):
+    async def call():
+        loop_thread = threading.get_ident()
+        with SessionLocal() as session:
+            return loop_thread, await run(session, lambda session: threading.get_ident())
+
+    loop_thread, crud_thread = asyncio.run(call())
+    assert crud_thread != loop_thread
+
+def test_burst_larger_than_the_pool_completes(db, league):
+    async def burst():
+        # Each read takes two crud calls on one session, the ETag's and the route's.
+        # Enough of them to fill the threadpool waiting for the pool, on top of
+        # the requests holding every connection.
+        requests = to_thread.current_default_thread_limiter().total_tokens \
+            + settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW + 10
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.wait_for(asyncio.gather(*(
+                client.get(f"/api/leagues/{league.id}/matches") for _ in range(requests)
+            )), timeout=20)
+        return {response.status_code for response in responses}
+
+    assert asyncio.run(burst()) == {200}
+
+@pytest.mark.parametrize("values", [
+    {"STATS_ENGINE": "numpy "},
+    {"STATS_ENGINE": "postgres"},
+    {"STATS_ENGINE_OVERRIDES": {"league": "SQL"}},
+])
+def test_unknown_stats_engines_fail_at_startup(values):
+    with pytest.raises(ValidationError):
+        Settings(**values)
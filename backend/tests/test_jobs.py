@@ -0,0 +1,89 @@
+import threading
+import time
+
+from app import crud, jobs, models, ratings, schemas
+from app.database import SessionLocal, settings
+
+from .test_player_stats import _stat_rows
+
+def _seed(db, league):
+    for player1, player2, score1, score2 in [
+        ("alice", "bob", 3, 1), ("carol", "alice", 2, 0), ("alice", "dave", 1, 4),
+        ("bob", "carol", 5, 2), ("alice", "bob", 0, 2), ("dave", "alice", 3, 2),
+        ("carol", "dave", 1, 0),
+    ]:
+        crud.create_match(db, league.id, schemas.MatchCreate(
+            player1=player1, player2=player2, player1_score=score1, player2_score=score2
+        ))
+
+def test_delete_player_retry_repairs_opponents(db, league, monkeypatch):
+    _seed(db, league)
+    monkeypatch.setattr(settings, "JOBS_DELETE_BATCH_SIZE", 2)
+    job = crud.delete_player(db, league.id, "alice")
+
+    # The first batch commits, then the run fails
+    batches = []
+    def failing_advance(job, rows):
+        batches.append(rows)
+        if len(batches) > 1:
+            raise RuntimeError("worker died")
+    with monkeypatch.context() as failing:
+        failing.setattr(jobs, "advance", failing_advance)
+        assert jobs.run_next(db)
+    assert db.get(models.Job, job.id).status == "failed"
+    assert db.query(models.Match).filter(models.Match.player1 == "alice").count() + \
+        db.query(models.Match).filter(models.Match.player2 == "alice").count() == 3
+
+    # Deleting again queues the failed job, with what it saved, rather than a fresh one
+    assert crud.delete_player(db, league.id, "alice").id == job.id
+    assert jobs.run_next(db)
+    assert not jobs.run_next(db)
+    assert db.get(models.Job, job.id).status == "succeeded"
+
+    stats = _stat_rows(db, league.id)
+    current = ratings.get_ratings(db, league.id)
+    assert "alice" not in stats
+    assert stats["bob"][:2] == (1, 1)
+    crud.rebuild_player_stats(db, league.id)
+    assert stats == _stat_rows(db, league.id)
+    assert current == ratings.get_ratings(db, league.id)
+
+def test_delete_player_twice_keeps_one_job(db, league):
+    _seed(db, league)
+    job = crud.delete_player(db, league.id, "alice")
+    assert crud.delete_player(db, league.id, "alice").id == job.id
+    assert db.query(models.Job).filter(models.Job.kind == "delete_player").count() == 1
+
+def test_deleted_player_is_hidden_before_the_job_runs(db, league, client):
+    _seed(db, league)
+    assert client.delete(f"/api/leagues/{league.id}/players/alice").status_code == 202
+
+    players = client.get(f"/api/leagues/{league.id}/player-stats").json()
+    assert "alice" not in {row["player_name"] for row in players}
+    rankings = client.get(f"/api/leagues/{league.id}/rankings").json()
+    assert "alice" not in {row["player_name"] for row in rankings}
+    assert client.get(f"/api/leagues/{league.id}/players/alice").status_code == 404
+    response = client.post(f"/api/leagues/{league.id}/matches", json={
+        "player1": "alice", "player2": "bob", "player1_score": 1, "player2_score": 0
+    })
+    assert response.status_code == 409
+
+    assert jobs.run_next(db)
+    assert db.query(models.Player).filter(models.Player.name == "alice").count() == 0
+
+def test_long_rebuild_is_not_taken_over(db, league, monkeypatch):
+    _seed(db, league)
+    monkeypatch.setattr(settings, "JOBS_STALE_SECONDS", 0.3)
+    rebuild = crud.rebuild_player_stats
+    monkeypatch.setattr(crud, "rebuild_player_stats", lambda db, league_id: time.sleep(1.2) or rebuild(db, league_id))
+    crud.rebuild_league_stats(db, league.id)
+
+    worker = threading.Thread(target=jobs.run_next, args=(db,))
+    worker.start()
+    time.sleep(0.1)
+    with SessionLocal() as other:
+        # Well past JOBS_STALE_SECONDS since the claim, the job is still its worker's
+        time.sleep(0.6)
+        assert jobs.claim(other) is None
+    worker.join()
+    assert db.query(models.Job).one().status == "succeeded"
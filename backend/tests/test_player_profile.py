@@ -0,0 +1,35 @@
+from app import crud, schemas
+from app.database import settings
+
+def test_match_log_and_database_give_the_same_profile(db, league, monkeypatch):
+    for player1, player2, score1, score2 in [
+        ("alice", "bob", 3, 1), ("carol", "alice", 2, 0), ("alice", "alice", 1, 0),
+        ("bob", "carol", 5, 2), ("alice", "bob", 0, 2), ("dave", "alice", 3, 2),
+    ]:
+        crud.create_match(db, league.id, schemas.MatchCreate(
+            player1=player1, player2=player2, player1_score=score1, player2_score=score2
+        ))
+    crud.create_player(db, league.id, "erin")
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+
+    def profiles():
+        return {
+            name: (crud.get_player_stats(db, league.id, name), crud.get_player_profile(db, league.id, name, window=2))
+            for name in ("alice", "bob", "erin", "nobody")
+        }
+
+    monkeypatch.setattr(settings, "MATCH_LOG_ENABLED", True)
+    logged = profiles()
+    monkeypatch.setattr(settings, "MATCH_LOG_ENABLED", False)
+    assert logged == profiles()
+    assert logged["alice"][0]["matches_played"] == 6
+    assert logged["nobody"] == (None, None)
+
+def test_player_without_matches_is_found_by_both_routes(db, league, client):
+    crud.create_player(db, league.id, "erin")
+    stats = client.get(f"/api/leagues/{league.id}/players/erin")
+    profile = client.get(f"/api/leagues/{league.id}/players/erin/profile")
+    assert stats.status_code == profile.status_code == 200
+    assert stats.json() == profile.json()["stats"]
+    assert stats.json()["matches_played"] == 0
+    assert client.get(f"/api/leagues/{league.id}/players/nobody").status_code == 404
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import inspect
+
+from app import crud, models, schemas
+from app.database import settings
+
+def _stat_rows(db, league_id):
+    db.expire_all()
+    return {
+        stat.player_name: tuple(getattr(stat, column) for column in crud._STAT_COLUMNS)
+        for stat in db.query(models.PlayerStat).filter(models.PlayerStat.league_id == league_id)
+    }
+
+def _match(player1, player2, player1_score, player2_score, created_at=None):
+    return schemas.MatchImport(
+        player1=player1,
+        player2=player2,
+        player1_score=player1_score,
+        player2_score=player2_score,
+        created_at=created_at
+    )
+
+def test_out_of_order_inserts_match_rebuild(db, league):
+    # Imported matches stamped ahead of the clock, so the next POSTs sort before them
+    ahead = datetime.now(timezone.utc) + timedelta(hours=1)
+    crud.create_matches_bulk(db, league.id, [
+        _match("alice", "bob", 3, 1, ahead),
+        _match("bob", "carol", 2, 0, ahead + timedelta(seconds=1)),
+    ])
+    crud.create_match(db, league.id, schemas.MatchCreate(player1="alice", player2="bob", player1_score=0, player2_score=3))
+    crud.create_match(db, league.id, schemas.MatchCreate(player1="carol", player2="alice", player1_score=1, player2_score=2))
+    crud.create_matches(db, league.id, [
+        (schemas.MatchCreate(player1="bob", player2="carol", player1_score=5, player2_score=4), None),
+        (schemas.MatchCreate(player1="alice", player2="carol", player1_score=2, player2_score=6), None),
+    ])
+    # Then history before everything so far, and appends after it
+    crud.create_matches_bulk(db, league.id, [_match("carol", "bob", 7, 1, ahead - timedelta(days=1))])
+    crud.create_matches_bulk(db, league.id, [_match("alice", "bob", 4, 2, ahead + timedelta(seconds=5))])
+    crud.create_match(db, league.id, schemas.MatchCreate(player1="bob", player2="alice", player1_score=1, player2_score=0))
+
+    incremental = _stat_rows(db, league.id)
+    crud.rebuild_player_stats(db, league.id)
+    assert incremental == _stat_rows(db, league.id)
+
+def test_appends_after_rebuild_stay_incremental(db, league):
+    crud.create_match(db, league.id, schemas.MatchCreate(player1="alice", player2="bob", player1_score=3, player2_score=1))
+    crud.rebuild_player_stats(db, league.id)
+    state = db.get(models.StatState, league.id)
+    last = db.query(models.Match).filter(models.Match.league_id == league.id).one()
+    assert state.last_match_id == last.id
+
+    crud.create_match(db, league.id, schemas.MatchCreate(player1="bob", player2="alice", player1_score=2, player2_score=0))
+    incremental = _stat_rows(db, league.id)
+    crud.rebuild_player_stats(db, league.id)
+    assert incremental == _stat_rows(db, league.id)
+
+def test_point_in_time_read_leaves_its_session_alone(db, league, monkeypatch):
+    monkeypatch.setattr(settings, "STATS_SNAPSHOT_INTERVAL", 2)
+    crud.create_matches_bulk(db, league.id, [_match("alice", "bob", i, 1) for i in range(5)])
+    db.refresh(league)
+
+    stats = crud._stats_until(db, league.id, None)
+    assert stats["alice"].matches_played == 5
+    # Nothing was committed or rolled back under the read, so loaded rows stay loaded
+    assert not inspect(league).expired_attributes
+    assert not db.new
+
+    crud._snapshot_writer.submit(lambda: None).result()
+    assert db.query(models.StatSnapshot).filter(models.StatSnapshot.league_id == league.id).count() == 2
@@ -0,0 +1,26 @@
+import os
+import pstats
+
+from fastapi.testclient import TestClient
+
+from app import crud, profiling, schemas
+from app.database import SessionLocal, run
+
+def test_sampled_profile_covers_crud_in_worker_threads(db, league, tmp_path):
+    crud.create_match(db, league.id, schemas.MatchCreate(player1="alice", player2="bob", player1_score=3, player2_score=1))
+
+    async def endpoint(scope, receive, send):
+        with SessionLocal() as session:
+            await run(session, crud.get_rankings, league.id)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    app = profiling.ProfilingMiddleware(endpoint, sample_rate=1.0, slow_ms=0, profile_dir=str(tmp_path))
+    assert TestClient(app).get("/").status_code == 200
+
+    [dump] = os.listdir(tmp_path)
+    functions = {
+        (os.path.basename(filename), function)
+        for filename, _, function in pstats.Stats(str(tmp_path / dump)).stats
+    }
+    assert ("crud.py", "get_rankings") in functions
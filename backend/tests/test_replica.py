@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+# Engines and the write-marking middleware are set up when ``app`` is imported,
+# so the app with a replica runs in a process of its own
+_SCRIPT = textwrap.dedent("""
+    import shutil
+    import time
+
+    from fastapi.testclient import TestClient
+
+    from app import models
+    from app.database import engine
+    from app.main import LAST_WRITE_COOKIE, LAST_WRITE_HEADER, app
+
+    models.Base.metadata.create_all(engine)
+    shutil.copy("primary.db", "replica.db")
+
+    writer = TestClient(app)
+    response = writer.post("/api/leagues", json={"name": "Replicated"})
+    assert response.status_code == 200, response.text
+    last_write = response.headers[LAST_WRITE_HEADER]
+    assert writer.cookies[LAST_WRITE_COOKIE] == last_write
+
+    def names(client, **headers):
+        return [league["name"] for league in client.get("/api/leagues", headers=headers).json()]
+
+    # The replica has not caught up, so only reads sent to the primary see the league
+    assert names(TestClient(app)) == []
+    assert names(writer) == ["Replicated"]
+    assert names(TestClient(app), **{LAST_WRITE_HEADER: last_write}) == ["Replicated"]
+    assert names(TestClient(app), **{LAST_WRITE_HEADER: str(time.time() - 3600)}) == []
+
+    shutil.copy("primary.db", "replica.db")
+    assert names(TestClient(app)) == ["Replicated"]
+""")
+
+def test_reads_follow_the_client_to_the_primary_after_a_write(tmp_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": "sqlite:///./primary.db",
+        "READ_DATABASE_URL": "sqlite:///file:replica.db?mode=ro&uri=true",
+        "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", _SCRIPT], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,26 @@
+import numpy as np
+
+from app import series
+
+def test_rolling_mean_averages_each_window():
+    values = np.array([1.0, 3.0, 5.0, 7.0, 9.0])
+    assert series.rolling_mean(values, 2).tolist() == [1.0, 2.0, 4.0, 6.0, 8.0]
+    # Until a full window is in, the mean covers what there is
+    assert series.rolling_mean(values, 3).tolist() == [1.0, 2.0, 3.0, 5.0, 7.0]
+    assert series.rolling_mean(values, 10).tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+def test_lttb_keeps_the_ends_and_bounds_the_points():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 25) * 100
+    y[437] = 1000.0
+    picked = series.lttb(x, y, 50)
+    assert len(picked) == 50
+    assert picked[0] == 0 and picked[-1] == 999
+    assert np.all(np.diff(picked) > 0)
+    # A spike the bucket averages would smooth away survives
+    assert 437 in picked
+
+def test_lttb_keeps_short_series_whole():
+    x = np.arange(10, dtype=np.float64)
+    assert series.lttb(x, x, 10).tolist() == list(range(10))
+    assert series.lttb(x, x, 2).tolist() == list(range(10))